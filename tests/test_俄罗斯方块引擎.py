@@ -0,0 +1,127 @@
+import random
+
+import pytest
+
+from 俄罗斯方块引擎 import (
+    ACTION_DOWN, ACTION_DROP, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_TICK,
+    BIT_PADDING, ROTATIONS, TetrisEngine,
+)
+
+# 随机策略里重力下落多一些，方块更快落地，棋盘上很快出现空洞和消行
+ACTIONS = (ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_DROP,
+           ACTION_TICK, ACTION_TICK, ACTION_TICK, ACTION_TICK)
+BOARD_SIZES = ((10, 20), (6, 12), (16, 30), (4, 8))
+
+
+def random_games(bitboard, games=40, max_steps=2000):
+    """按种子玩随机策略的若干局，每一步之后产出引擎"""
+    for seed in range(games):
+        width, height = BOARD_SIZES[seed % len(BOARD_SIZES)]
+        engine = TetrisEngine(width, height, seed=seed, bitboard=bitboard)
+        policy = random.Random(seed)
+        for _ in range(max_steps):
+            if engine.game_over:
+                break
+            engine.step(policy.choice(ACTIONS))
+            yield engine
+
+
+def rescan(engine):
+    """从grid整体重新计算列高度、空洞数和各行方块数"""
+    heights = [0] * engine.width
+    holes = 0
+    for x in range(engine.width):
+        for y in range(engine.height):
+            if engine.grid[y][x]:
+                if not heights[x]:
+                    heights[x] = engine.height - y
+            elif heights[x]:
+                holes += 1
+    row_counts = [sum(1 for cell in row if cell) for row in engine.grid]
+    return heights, holes, row_counts
+
+
+def row_mask(engine, row):
+    return engine.empty_row | sum(1 << (x + BIT_PADDING) for x, cell in enumerate(row) if cell)
+
+
+def slow_drop_position(engine, piece):
+    distance = 0
+    while engine.valid_move(piece, 0, distance + 1):
+        distance += 1
+    return piece.y + distance
+
+
+@pytest.mark.parametrize('bitboard', [False, True])
+def test_counters_match_rescan(bitboard):
+    for engine in random_games(bitboard):
+        heights, holes, row_counts = rescan(engine)
+        assert engine.heights == heights
+        assert engine.holes == holes
+        if bitboard:
+            assert engine.rows[:engine.height] == [row_mask(engine, row) for row in engine.grid]
+        else:
+            assert engine.row_counts == row_counts
+
+
+@pytest.mark.parametrize('bitboard', [False, True])
+def test_sync_board_rebuilds_counters(bitboard):
+    engine = TetrisEngine(8, 12, seed=3, bitboard=bitboard)
+    rng = random.Random(3)
+    for y in range(6, engine.height):
+        engine.grid[y] = [(1, 1, 1) if rng.random() < 0.6 else 0 for _ in range(engine.width)]
+    engine.sync_board()
+    heights, holes, row_counts = rescan(engine)
+    assert engine.heights == heights
+    assert engine.holes == holes
+    if bitboard:
+        assert engine.rows[:engine.height] == [row_mask(engine, row) for row in engine.grid]
+    else:
+        assert engine.row_counts == row_counts
+
+
+def test_drop_position_matches_row_by_row():
+    for engine in random_games(False, games=20):
+        piece = engine.current_piece.copy()
+        for rotation in range(4):
+            piece.rotation = rotation
+            width = ROTATIONS[piece.shape_id][rotation].width
+            for x in range(engine.width - width + 1):
+                piece.x = x
+                if engine.valid_move(piece, 0, 0):
+                    assert engine.drop_position(piece) == slow_drop_position(engine, piece)
+
+
+def test_drop_position_under_overhang():
+    # 第15行除了中间两格都被占满，O方块在屋檐下面和上面各落一次
+    engine = TetrisEngine(10, 20, seed=1)
+    for x in range(10):
+        if x not in (4, 5):
+            engine.grid[15][x] = (1, 1, 1)
+    engine.sync_board()
+    piece = engine.current_piece
+    piece.reset(1, 0, 4, 16)
+    assert engine.drop_position() == 18
+    piece.reset(1, 0, 0, 0)
+    assert engine.drop_position() == 13
+
+
+def test_bitboard_matches_list():
+    # 同一个种子和动作序列，位棋盘和列表两种实现必须逐步一致
+    for seed in range(40):
+        width, height = BOARD_SIZES[seed % len(BOARD_SIZES)]
+        plain = TetrisEngine(width, height, seed=seed)
+        fast = TetrisEngine(width, height, seed=seed, bitboard=True)
+        policy = random.Random(seed)
+        for _ in range(2000):
+            if plain.game_over:
+                break
+            piece = plain.current_piece
+            for dx, dy in ((-1, 0), (1, 0), (0, 1), (0, 0)):
+                assert plain.valid_move(piece, dx, dy) == fast.valid_move(fast.current_piece, dx, dy)
+            action = policy.choice(ACTIONS)
+            assert plain.step(action) == fast.step(action)
+            assert plain.grid == fast.grid
+            assert plain.current_piece.key() == fast.current_piece.key()
+            assert (plain.score, plain.lines, plain.game_over) == (fast.score, fast.lines, fast.game_over)
+        assert fast.game_over == plain.game_over
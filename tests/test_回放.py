@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from 俄罗斯方块引擎 import (
+    ACTION_DOWN, ACTION_DROP, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_TICK,
+    RANDOMIZER_NAMES, TetrisEngine,
+)
+from 回放 import (
+    GAME_SNAKE, GAME_TETRIS, ReplayRecorder, decode, main, verify, verify_file, write_varint,
+)
+from 贪吃蛇AI import Autopilot
+from 贪吃蛇引擎 import DIRECTIONS, SnakeEngine
+
+TETRIS_ACTIONS = (ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_DROP,
+                  ACTION_TICK, ACTION_TICK, ACTION_TICK)
+
+
+def record_tetris(seed, randomizer, width=6, height=12, max_steps=3000):
+    """像窗口版一样只记录非重力的动作，返回(回放数据, 引擎)"""
+    engine = TetrisEngine(width, height, seed=seed, bitboard=True, randomizer=randomizer)
+    recorder = ReplayRecorder(GAME_TETRIS, seed, width, height, RANDOMIZER_NAMES.index(randomizer))
+    policy = random.Random(seed)
+    for _ in range(max_steps):
+        if engine.game_over:
+            break
+        action = policy.choice(TETRIS_ACTIONS)
+        if action != ACTION_TICK:
+            recorder.record(engine.ticks, action)
+        engine.step(action)
+    return recorder.finish(engine.ticks, engine.score), engine
+
+
+def record_snake(seed, width=8, height=6, max_steps=3000):
+    """自动驾驶加上随机转向玩一局，只在方向改变时记录，返回(回放数据, 引擎)"""
+    engine = SnakeEngine(width, height, seed=seed)
+    recorder = ReplayRecorder(GAME_SNAKE, seed, width, height)
+    autopilot = Autopilot(width, height)
+    policy = random.Random(seed)
+    while not engine.game_over and engine.steps < max_steps:
+        snake = engine.snake
+        direction = snake.direction
+        if policy.random() < 0.05:
+            snake.turn(policy.choice(DIRECTIONS))
+        else:
+            snake.turn(autopilot.next_direction(snake, engine.food))
+        if snake.direction != direction:
+            recorder.record(engine.steps, DIRECTIONS.index(snake.direction))
+        engine.step()
+    return recorder.finish(engine.steps, engine.score), engine
+
+
+@pytest.mark.parametrize('randomizer', RANDOMIZER_NAMES)
+def test_tetris_round_trip(randomizer):
+    total = 0
+    for seed in range(10):
+        data, engine = record_tetris(seed, randomizer)
+        replay = decode(data)
+        assert (replay.seed, replay.width, replay.height) == (seed, engine.width, engine.height)
+        assert RANDOMIZER_NAMES[replay.variant] == randomizer
+        result = verify(data)
+        assert result['valid'], (seed, result)
+        assert result['score'] == engine.score
+        total += engine.score
+    assert total > 0  # 至少有几局消过行，校验不是在比较0分
+
+
+def test_snake_round_trip():
+    total = 0
+    for seed in range(10):
+        data, engine = record_snake(seed)
+        result = verify(data)
+        assert result['valid'], (seed, result)
+        assert result['score'] == engine.score
+        total += engine.score
+    assert total > 0
+
+
+def test_tampered_score_is_invalid():
+    data, engine = record_snake(1)
+    replay = decode(data)
+    assert replay.score > 0
+    # 得分是最后一个变长整数，改小之后重放结果不再一致
+    score = bytearray()
+    write_varint(score, replay.score)
+    tampered = bytearray(data[:-len(score)])
+    write_varint(tampered, replay.score - 1)
+    tampered = bytes(tampered)
+    result = verify(tampered)
+    assert not result['valid']
+    assert result['claimed'] == replay.score - 1
+
+
+def test_broken_files_are_reported(tmp_path, capsys):
+    data, _ = record_tetris(0, 'uniform')
+    (tmp_path / 'good.rpl').write_bytes(data)
+    (tmp_path / 'truncated.rpl').write_bytes(data[:10])
+    (tmp_path / 'junk.rpl').write_bytes(b'hello')
+    assert verify_file(str(tmp_path / 'good.rpl'))['valid']
+    broken = verify_file(str(tmp_path / 'truncated.rpl'))
+    assert not broken['valid'] and broken['error']
+
+    assert main([str(tmp_path), '-j', '1']) == 1
+    out = capsys.readouterr().out
+    assert 'truncated.rpl' in out and 'junk.rpl' in out and 'good.rpl' not in out
+
+
+def test_missing_path_is_reported(tmp_path, capsys):
+    assert main([str(tmp_path / 'missing')]) == 1
+    assert 'missing' in capsys.readouterr().err
@@ -0,0 +1,43 @@
+import pytest
+
+from 贪吃蛇AI import Autopilot, hamiltonian_cycle
+from 贪吃蛇引擎 import SnakeEngine
+
+# 这些局曾在刚吃到第一个食物时掉头撞墙
+REGRESSION_GAMES = ((8, 5, 3), (12, 7, 2), (4, 4, 11))
+# 没有回路的棋盘：必须在有限步数内结束，不能无限绕圈
+STALL_GAMES = ((7, 7, 0), (9, 9, 0), (5, 7, 1))
+
+
+def play(width, height, seed, max_steps):
+    """用自动驾驶在无渲染的引擎上玩一局，返回引擎"""
+    engine = SnakeEngine(width, height, seed=seed)
+    autopilot = Autopilot(width, height)
+    while not engine.game_over and engine.steps < max_steps:
+        engine.step(autopilot.next_direction(engine.snake, engine.food))
+    return engine
+
+
+@pytest.mark.parametrize('width, height', [(2, 2), (4, 3), (3, 4), (6, 6), (9, 4), (4, 9)])
+def test_hamiltonian_cycle(width, height):
+    cycle = hamiltonian_cycle(width, height)
+    assert sorted(cycle) == [(x, y) for x in range(width) for y in range(height)]
+    for (x1, y1), (x2, y2) in zip(cycle, cycle[1:] + cycle[:1]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1
+
+
+@pytest.mark.parametrize('width, height', [(1, 4), (3, 3), (5, 7)])
+def test_no_hamiltonian_cycle(width, height):
+    assert hamiltonian_cycle(width, height) is None
+
+
+@pytest.mark.parametrize('width, height, seed', REGRESSION_GAMES)
+def test_autopilot_fills_the_board(width, height, seed):
+    engine = play(width, height, seed, 100 * width * height)
+    assert engine.won
+
+
+@pytest.mark.parametrize('width, height, seed', STALL_GAMES)
+def test_autopilot_ends_without_a_cycle(width, height, seed):
+    engine = play(width, height, seed, 100 * width * height)
+    assert engine.game_over
@@ -1,248 +1,409 @@
+import argparse
+import time
+
 import pygame
-import random
 
-# 初始化pygame
-pygame.init()
+try:
+    import numpy as np
+except ImportError:  # 没有numpy时逐格绘制棋盘
+    np = None
+
+from 俄罗斯方块引擎 import (
+    GRID_WIDTH, GRID_HEIGHT, BLACK, WHITE, RED,
+    ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_DROP, ACTION_TICK,
+    COLORS, RANDOMIZER_NAMES, ROTATIONS, TetrisEngine,
+)
+from 俄罗斯方块AI import TetrisBot
+from 回放 import GAME_NAMES, GAME_TETRIS, ReplayRecorder, save_replay
+from 存档 import TOP_SIZE, ScoreStore
+from 性能分析 import Profiler
+from 游戏循环 import IDLE_TIMEOUT, RENDER_FPS, FixedTimestep
+from 字体 import find_font, load_font
+
+# pygame不在导入时初始化，Tetris只启动用到的显示模块，字体模块由load_font按需初始化
 
 # 设置游戏窗口
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
-BLOCK_SIZE = 30
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
-GAME_WIDTH = BLOCK_SIZE * GRID_WIDTH
-GAME_HEIGHT = BLOCK_SIZE * GRID_HEIGHT
-
-# 计算游戏区域的起始位置（居中）
-GAME_X = (WINDOW_WIDTH - GAME_WIDTH) // 2
-GAME_Y = (WINDOW_HEIGHT - GAME_HEIGHT) // 2
-
-# 颜色定义
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-CYAN = (0, 255, 255)
-MAGENTA = (255, 0, 255)
-YELLOW = (255, 255, 0)
-ORANGE = (255, 165, 0)
-
-# 修改方块形状定义，确保每个形状都是二维列表
-SHAPES = [
-    [[1, 1, 1, 1],
-     [0, 0, 0, 0]],  # I
-
-    [[1, 1],
-     [1, 1]],  # O
-
-    [[1, 1, 1],
-     [0, 1, 0]],  # T
-
-    [[1, 1, 1],
-     [1, 0, 0]],  # L
-
-    [[1, 1, 1],
-     [0, 0, 1]],  # J
-
-    [[1, 1, 0],
-     [0, 1, 1]],  # S
-
-    [[0, 1, 1],
-     [1, 1, 0]]   # Z
-]
-
-COLORS = [CYAN, YELLOW, MAGENTA, ORANGE, BLUE, GREEN, RED]
-
-class Tetris:
-    def __init__(self):
+BLOCK_SIZE = 30      # 格子的最大边长，棋盘较大时按窗口缩小
+MIN_BLOCK_SIZE = 3   # 格子小于这个尺寸时无法分辨
+SIDE_WIDTH = 160     # 棋盘两侧至少留给分数和预览的宽度
+
+# 棋盘颜色编号：0是空格，方块颜色依次为1..len(COLORS)
+COLOR_INDEX = {color: i + 1 for i, color in enumerate(COLORS)}
+
+# 方块随机器（见俄罗斯方块引擎.RANDOMIZERS）
+RANDOMIZER = 'bag'
+
+# 右侧的下一个方块预览
+PREVIEW_BLOCK = 20  # 预览方块的格子大小
+PREVIEW_SLOT = 60   # 每个预览方块占的高度
+
+# 左侧分数下方的排行榜
+LEADERBOARD_POS = (10, 60)
+
+# 性能分析叠加层的位置（棋盘左侧的空白处）
+PROFILER_POS = (10, WINDOW_HEIGHT - 130)
+
+# 按键与引擎动作的对应关系
+KEY_ACTIONS = {
+    pygame.K_LEFT: ACTION_LEFT,
+    pygame.K_RIGHT: ACTION_RIGHT,
+    pygame.K_DOWN: ACTION_DOWN,
+    pygame.K_UP: ACTION_ROTATE,
+    pygame.K_SPACE: ACTION_DROP,
+}
+
+class Tetris(TetrisEngine):
+    """在逻辑核心之上负责窗口、输入和绘制"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        # 棋盘尺寸可配置，格子大小取能放进窗口的最大值，棋盘居中
+        self.block_size = min(BLOCK_SIZE, WINDOW_HEIGHT // height,
+                              (WINDOW_WIDTH - 2 * SIDE_WIDTH) // width)
+        if self.block_size < MIN_BLOCK_SIZE:
+            raise ValueError(f"棋盘{width}x{height}太大，窗口中放不下")
+        self.game_width = self.block_size * width
+        self.game_height = self.block_size * height
+        self.game_x = (WINDOW_WIDTH - self.game_width) // 2
+        self.game_y = (WINDOW_HEIGHT - self.game_height) // 2
+        self.preview_x = self.game_x + self.game_width + 30
+        self.preview_y = self.game_y + 10
+        self.preview_width = WINDOW_WIDTH - self.preview_x - 20
+
+        pygame.display.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("俄罗斯方块")
         
-        # 改进的字体加载方式
-        font_paths = [
-            "simhei.ttf",  # 当前目录下的黑体
-            "C:/Windows/Fonts/simhei.ttf",  # Windows 系统黑体
-            "C:/Windows/Fonts/msyh.ttc",    # Windows 系统微软雅黑
-            "/System/Library/Fonts/PingFang.ttc",  # macOS 系统字体
-            "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf"  # Linux 系统字体
-        ]
-        
-        self.font = None
-        self.game_over_font = None
-        
-        # 尝试加载字体
-        for font_path in font_paths:
-            try:
-                self.font = pygame.font.Font(font_path, 36)
-                self.game_over_font = pygame.font.Font(font_path, 48)
-                break
-            except:
-                continue
-                
-        # 如果所有字体都加载失败，使用系统默认字体
-        if self.font is None:
+        # 中文字体由字体模块查找并缓存在磁盘上，找不到时使用默认字体
+        if find_font() is None:
             print("警告：无法加载中文字体，使用系统默认字体")
-            self.font = pygame.font.SysFont(None, 36)
-            self.game_over_font = pygame.font.SysFont(None, 48)
+        self.font = load_font(36)
+        self.game_over_font = load_font(48)
+        self.small_font = load_font(22)
             
         self.clock = pygame.time.Clock()
-        self.reset_game()
-
-    def reset_game(self):
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = self.new_piece()
-        self.game_over = False
-        self.score = 0
-
-    def new_piece(self):
-        # 随机选择一个方块和颜色
-        shape_idx = random.randint(0, len(SHAPES) - 1)
-        return {
-            'shape': [row[:] for row in SHAPES[shape_idx]],  # 创建深拷贝
-            'color': COLORS[shape_idx],
-            'x': GRID_WIDTH // 2 - len(SHAPES[shape_idx][0]) // 2,
-            'y': 0
-        }
-
-    def rotate_piece(self):
-        # 获取当前方块的形状
-        shape = self.current_piece['shape']
-        # 创建新的旋转后的形状矩阵
-        rows = len(shape)
-        cols = len(shape[0])
-        rotated = [[0 for _ in range(rows)] for _ in range(cols)]
-        
-        # 执行旋转
-        for r in range(rows):
-            for c in range(cols):
-                rotated[c][rows-1-r] = shape[r][c]
-        
-        # 保存原始形状
-        original_shape = self.current_piece['shape']
-        self.current_piece['shape'] = rotated
-        
-        # 如果旋转后的位置无效���则恢复原始形状
-        if not self.valid_move(self.current_piece, 0, 0):
-            self.current_piece['shape'] = original_shape
-
-    def valid_move(self, piece, x, y):
-        for i in range(len(piece['shape'])):
-            for j in range(len(piece['shape'][i])):
-                if piece['shape'][i][j]:
-                    new_x = piece['x'] + j + x
-                    new_y = piece['y'] + i + y
-                    if (new_x < 0 or new_x >= GRID_WIDTH or 
-                        new_y >= GRID_HEIGHT or 
-                        (new_y >= 0 and self.grid[new_y][new_x])):
-                        return False
-        return True
 
-    def place_piece(self):
-        for i in range(len(self.current_piece['shape'])):
-            for j in range(len(self.current_piece['shape'][i])):
-                if self.current_piece['shape'][i][j]:
-                    self.grid[self.current_piece['y'] + i][self.current_piece['x'] + j] = self.current_piece['color']
+        # 保留模式渲染的缓存状态
+        self.board_surface = pygame.Surface((self.game_width, self.game_height)).convert()
+        if np is not None:
+            # 颜色编号到棋盘表面像素值的查找表，以及整块棋盘的像素缓冲区（按surfarray的x、y顺序）
+            self.palette = np.array([self.board_surface.map_rgb(color) for color in [BLACK] + COLORS],
+                                    dtype=np.uint32)
+            self.board_pixels = np.empty((self.game_width, self.game_height), dtype=np.uint32)
+        self.drawn_board_version = None
+        self.drawn_piece_key = None
+        self.drawn_piece_rect = None
+        self.drawn_score = None
+        self.drawn_game_over = False
+        self.score_surface = None
+        self.score_rect = None
+        self.full_redraw = True
 
-    def clear_lines(self):
-        lines_cleared = 0
-        y = GRID_HEIGHT - 1
-        while y >= 0:
-            if all(cell != 0 for cell in self.grid[y]):
-                lines_cleared += 1
-                for y2 in range(y, 0, -1):
-                    self.grid[y2] = self.grid[y2 - 1][:]
-                self.grid[0] = [0] * GRID_WIDTH
-            else:
-                y -= 1
-        return lines_cleared
+        # 自动游戏：按A键切换，由机器人为每个新方块选择落点
+        self.bot = TetrisBot()
+        self.autoplay = False
+        self.planned_piece = None
+
+        # 预览用的方块贴图和标题只渲染一次
+        self.piece_sprites = self.build_piece_sprites()
+        self.preview_label = self.font.render('下一个', True, WHITE)
+        self.drawn_preview = None
+
+        # 每局结束时写入本地存档，排行榜只在写入新记录后重画
+        self.store = ScoreStore()
+        self.leaderboard_label = self.small_font.render('排行榜', True, WHITE)
+        self.leaderboard_rect = pygame.Rect(
+            LEADERBOARD_POS, (SIDE_WIDTH - 20, self.leaderboard_label.get_height() + 4 +
+                              TOP_SIZE * self.small_font.get_linesize()))
+        self.drawn_leaderboard = None
+
+        # 性能分析：F3显示叠加层，F4导出trace
+        self.profiler = Profiler()
+
+        super().__init__(width, height, randomizer=RANDOMIZER)
+        self.preview_rect = pygame.Rect(
+            self.preview_x, self.preview_y, self.preview_width,
+            self.preview_label.get_height() + self.preview * PREVIEW_SLOT)
+
+    def build_piece_sprites(self):
+        """把每种方块的初始朝向渲染成小贴图"""
+        sprites = []
+        for shape_id, rotations in enumerate(ROTATIONS):
+            state = rotations[0]
+            left, top, right, bottom = state.bbox
+            surface = pygame.Surface(((right - left + 1) * PREVIEW_BLOCK,
+                                      (bottom - top + 1) * PREVIEW_BLOCK)).convert()
+            surface.fill(BLACK)
+            for dx, dy in state.cells:
+                pygame.draw.rect(surface, COLORS[shape_id],
+                                 ((dx - left) * PREVIEW_BLOCK, (dy - top) * PREVIEW_BLOCK,
+                                  PREVIEW_BLOCK - 1, PREVIEW_BLOCK - 1))
+            sprites.append(surface)
+        return sprites
+
+    def draw_preview(self):
+        """绘制预览队列，返回需要更新的矩形"""
+        self.screen.fill(BLACK, self.preview_rect)
+        self.screen.blit(self.preview_label, (self.preview_x, self.preview_y))
+        slot_y = self.preview_y + self.preview_label.get_height()
+        for shape_id in self.drawn_preview:
+            sprite = self.piece_sprites[shape_id]
+            self.screen.blit(sprite, sprite.get_rect(
+                midtop=(self.preview_x + self.preview_width // 2, slot_y + 10)))
+            slot_y += PREVIEW_SLOT
+        return self.preview_rect
+
+    def draw_leaderboard(self, records):
+        """绘制左侧的排行榜，返回需要更新的矩形"""
+        self.screen.fill(BLACK, self.leaderboard_rect)
+        x, y = self.leaderboard_rect.topleft
+        self.screen.blit(self.leaderboard_label, (x, y))
+        y += self.leaderboard_label.get_height() + 4
+        for rank, record in enumerate(records, 1):
+            text = self.small_font.render(f'{rank}. {record.score}  {record.lines}行', True, WHITE)
+            self.screen.blit(text, (x, y))
+            y += self.small_font.get_linesize()
+        return self.leaderboard_rect
 
     def draw(self):
-        self.screen.fill(BLACK)
-        
-        # 绘制游戏区域边框
-        pygame.draw.rect(self.screen, WHITE, 
-                        (GAME_X - 2, GAME_Y - 2, 
-                         GAME_WIDTH + 4, GAME_HEIGHT + 4), 2)
-
-        # 绘制已放置的方块
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                if self.grid[y][x]:
-                    pygame.draw.rect(self.screen, self.grid[y][x],
-                                   (GAME_X + x * BLOCK_SIZE,
-                                    GAME_Y + y * BLOCK_SIZE,
-                                    BLOCK_SIZE - 1, BLOCK_SIZE - 1))
-
-        # 绘制当前方块
-        if not self.game_over:
-            for i in range(len(self.current_piece['shape'])):
-                for j in range(len(self.current_piece['shape'][i])):
-                    if self.current_piece['shape'][i][j]:
-                        pygame.draw.rect(self.screen, self.current_piece['color'],
-                                       (GAME_X + (self.current_piece['x'] + j) * BLOCK_SIZE,
-                                        GAME_Y + (self.current_piece['y'] + i) * BLOCK_SIZE,
-                                        BLOCK_SIZE - 1, BLOCK_SIZE - 1))
-
-        # 修改分数显示
-        score_text = self.font.render(f'分数: {self.score}', True, WHITE)
-        self.screen.blit(score_text, (10, 10))
+        """只重绘发生变化的区域，并用display.update推送这些矩形"""
+        profiler = self.profiler
+        dirty = []
+        block = self.block_size
+        game_x, game_y = self.game_x, self.game_y
+        board_rect = pygame.Rect(game_x, game_y, self.game_width, self.game_height)
 
-        if self.game_over:
+        # 首帧、窗口重新暴露或游戏结束状态变化时整屏重绘
+        full_redraw = self.full_redraw or self.drawn_game_over != self.game_over
+        if full_redraw:
+            self.screen.fill(BLACK)
+
+            # 绘制游戏区域边框
+            pygame.draw.rect(self.screen, WHITE,
+                            (game_x - 2, game_y - 2,
+                             self.game_width + 4, self.game_height + 4), 2)
+            self.drawn_score = None
+            dirty.append(self.screen.get_rect())
+
+        # 已放置的方块缓存在离屏表面上，只有棋盘变化时才重画
+        board_changed = self.drawn_board_version != self.board_version
+        if board_changed:
+            if self.cells is not None:
+                self.blit_board()
+            else:
+                self.board_surface.fill(BLACK)
+                for y in range(self.height):
+                    for x in range(self.width):
+                        if self.grid[y][x]:
+                            pygame.draw.rect(self.board_surface, self.grid[y][x],
+                                           (x * block, y * block, block - 1, block - 1))
+            self.drawn_board_version = self.board_version
+        profiler.mark('draw.board')
+
+        # 当前方块
+        piece_key = None if self.game_over else self.current_piece.key()
+        if full_redraw or board_changed:
+            self.screen.blit(self.board_surface, board_rect)
+            dirty.append(board_rect)
+        elif piece_key != self.drawn_piece_key and self.drawn_piece_rect:
+            # 用缓存的棋盘擦掉上一帧的方块
+            old_rect = self.drawn_piece_rect
+            self.screen.blit(self.board_surface, old_rect,
+                             old_rect.move(-game_x, -game_y))
+            dirty.append(old_rect)
+
+        if full_redraw or board_changed or piece_key != self.drawn_piece_key:
+            self.drawn_piece_rect = None
+            if not self.game_over:
+                piece = self.current_piece
+                left, top, right, bottom = piece.state.bbox
+                # 落点预览：由列高度算出落到底的位置，画空心轮廓；先画，重叠时被方块盖住
+                ghost_y = self.drop_position(piece)
+                if ghost_y != piece.y:
+                    for dx, dy in piece.cells:
+                        pygame.draw.rect(self.screen, piece.color,
+                                       (game_x + (piece.x + dx) * block,
+                                        game_y + (ghost_y + dy) * block,
+                                        block - 1, block - 1), 1)
+                for dx, dy in piece.cells:
+                    pygame.draw.rect(self.screen, piece.color,
+                                   (game_x + (piece.x + dx) * block,
+                                    game_y + (piece.y + dy) * block,
+                                    block - 1, block - 1))
+                # 矩形同时覆盖方块和落点预览，下一帧一起擦掉
+                self.drawn_piece_rect = pygame.Rect(
+                    game_x + (piece.x + left) * block,
+                    game_y + (piece.y + top) * block,
+                    (right - left + 1) * block,
+                    (ghost_y - piece.y + bottom - top + 1) * block).clip(board_rect)
+                dirty.append(self.drawn_piece_rect)
+            self.drawn_piece_key = piece_key
+        profiler.mark('draw.piece')
+
+        # 分数只在变化时重新渲染
+        if self.drawn_score != self.score:
+            if self.score_rect:
+                self.screen.fill(BLACK, self.score_rect)
+                dirty.append(self.score_rect)
+            self.score_surface = self.font.render(f'分数: {self.score}', True, WHITE)
+            self.score_rect = self.screen.blit(self.score_surface, (10, 10))
+            dirty.append(self.score_rect)
+            self.drawn_score = self.score
+
+        # 排行榜查询由存档缓存，结果对象不变时不重画
+        leaderboard = self.store.top(GAME_NAMES[GAME_TETRIS])
+        if full_redraw or leaderboard is not self.drawn_leaderboard:
+            self.drawn_leaderboard = leaderboard
+            dirty.append(self.draw_leaderboard(leaderboard))
+
+        # 预览队列只在出现新方块或整屏重绘时重画
+        preview = self.queue.peek()
+        if full_redraw or preview != self.drawn_preview:
+            self.drawn_preview = preview
+            dirty.append(self.draw_preview())
+        profiler.mark('draw.panel')
+
+        if self.game_over and full_redraw:
             game_over_text = self.game_over_font.render('游戏结束!', True, RED)
             text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2))
             self.screen.blit(game_over_text, text_rect)
 
-        pygame.display.flip()
+        if profiler.enabled:
+            dirty.append(profiler.draw_overlay(self.screen, PROFILER_POS))
+            profiler.mark('draw.profiler')
+
+        self.full_redraw = False
+        self.drawn_game_over = self.game_over
+        if dirty:
+            pygame.display.update(dirty)
+        profiler.mark('display.update')
+
+    def blit_board(self):
+        """由颜色编号数组一次查表生成整块棋盘的像素，再用一次blit_array写入棋盘表面"""
+        block = self.block_size
+        # 把像素缓冲区看成(列, 格内x, 行, 格内y)，每个格子的颜色广播到整块
+        view = self.board_pixels.reshape(self.width, block, self.height, block)
+        view[:] = self.palette[self.cells.T][:, None, :, None]
+        # 格子右侧和下方留1像素的缝
+        view[:, block - 1] = self.palette[0]
+        view[:, :, :, block - 1] = self.palette[0]
+        pygame.surfarray.blit_array(self.board_surface, self.board_pixels)
+
+    def sync_board(self):
+        """直接修改self.grid之后调用，颜色编号数组也按grid重建"""
+        super().sync_board()
+        if self.cells is not None:
+            self.cells[:] = [[COLOR_INDEX.get(cell, 0) for cell in row] for row in self.grid]
+
+    def place_piece(self):
+        """锁定方块时同步更新颜色编号数组"""
+        super().place_piece()
+        if self.cells is not None:
+            piece = self.current_piece
+            for dx, dy in piece.cells:
+                self.cells[piece.y + dy, piece.x + dx] = piece.shape_id + 1
+
+    def clear_lines(self):
+        """消行时颜色编号数组同样压缩掉满行"""
+        lines = super().clear_lines()
+        if lines and self.cells is not None:
+            keep = self.cells[~self.cells.all(axis=1)]
+            self.cells[:lines] = 0
+            self.cells[lines:] = keep
+        return lines
+
+    def reset_game(self, seed=None):
+        """开始新的一局并开始录制回放"""
+        # 已锁定方块的颜色编号，与self.grid保持同步
+        self.cells = np.zeros((self.height, self.width), dtype=np.uint8) if np is not None else None
+        super().reset_game(seed)
+        self.round_start = time.monotonic()
+        self.recorder = ReplayRecorder(GAME_TETRIS, self.seed, self.width, self.height,
+                                       RANDOMIZER_NAMES.index(self.randomizer))
+
+    def step(self, action):
+        """执行一个动作：玩家动作写入回放，重力下落只推进回放的时间轴，游戏结束时保存回放和记录"""
+        if self.game_over:
+            return 0
+        if action != ACTION_TICK:
+            self.recorder.record(self.ticks, action)
+        lines = super().step(action)
+        if self.game_over:
+            try:
+                save_replay(self.recorder.finish(self.ticks, self.score))
+            except OSError as e:
+                print("回放保存失败:", e)
+            self.store.add(GAME_NAMES[GAME_TETRIS], self.score, time.monotonic() - self.round_start,
+                           lines=self.lines, seed=self.seed)
+        return lines
 
     def run(self):
-        fall_time = 0
         fall_speed = 500  # 初始下落速度（毫秒）
+        gravity = FixedTimestep(fall_speed)
         
+        profiler = self.profiler
+        idle_drawn = False  # 游戏结束画面已经画好
         while True:
-            # 获取每帧的时间增量
-            delta_time = self.clock.tick(60)  # 修改这里，获取时间增量
+            profiler.begin_frame()
+            if idle_drawn and self.game_over:
+                # 游戏结束后阻塞等待输入，不再按帧率空转；醒来后丢弃等待的时间
+                events = [pygame.event.wait(IDLE_TIMEOUT)]
+                self.clock.tick()
+                delta_time = 0
+                profiler.mark('idle.wait')
+            else:
+                # 获取每帧的时间增量
+                events = []
+                delta_time = self.clock.tick(RENDER_FPS)
+                profiler.mark('clock.tick')
+            events.extend(pygame.event.get())
             
             # 处理事件
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     return
+                if event.type == pygame.VIDEOEXPOSE:
+                    self.full_redraw = True
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.toggle()
+                    self.full_redraw = True  # 擦掉叠加层
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and profiler.enabled:
+                    print("trace已保存:", profiler.dump_trace())
                 if event.type == pygame.KEYDOWN and not self.game_over:
-                    if event.key == pygame.K_LEFT:
-                        if self.valid_move(self.current_piece, -1, 0):
-                            self.current_piece['x'] -= 1
-                    elif event.key == pygame.K_RIGHT:
-                        if self.valid_move(self.current_piece, 1, 0):
-                            self.current_piece['x'] += 1
-                    elif event.key == pygame.K_DOWN:
-                        if self.valid_move(self.current_piece, 0, 1):
-                            self.current_piece['y'] += 1
-                    elif event.key == pygame.K_UP:
-                        self.rotate_piece()
-                    elif event.key == pygame.K_SPACE:
-                        while self.valid_move(self.current_piece, 0, 1):
-                            self.current_piece['y'] += 1
+                    if event.key in KEY_ACTIONS:
+                        self.step(KEY_ACTIONS[event.key])
+                    elif event.key == pygame.K_a:
+                        self.autoplay = not self.autoplay
+                        self.planned_piece = None
                 elif event.type == pygame.KEYDOWN and self.game_over:
                     if event.key == pygame.K_r:
                         self.reset_game()
+                        self.planned_piece = None
+            profiler.mark('events')
+
+            # 自动游戏时每个新方块出现后立即移动到机器人选择的落点，由重力锁定
+            if self.autoplay and not self.game_over and self.planned_piece != self.pieces:
+                self.step_many(self.bot.actions(self))
+                self.planned_piece = self.pieces
 
+            # 按固定步长推进重力下落，与帧率无关
             if not self.game_over:
-                fall_time += delta_time  # 使用实际的时间增量
-                if fall_time >= fall_speed:
-                    fall_time = 0
-                    if self.valid_move(self.current_piece, 0, 1):
-                        self.current_piece['y'] += 1
-                    else:
-                        self.place_piece()
-                        lines = self.clear_lines()
-                        self.score += lines * 100
-                        self.current_piece = self.new_piece()
-                        if not self.valid_move(self.current_piece, 0, 0):
-                            self.game_over = True
+                for _ in range(gravity.advance(delta_time)):
+                    self.step(ACTION_TICK)
+            else:
+                gravity.reset()
+            profiler.mark('simulate')
 
             self.draw()
+            idle_drawn = self.game_over
 
 if __name__ == '__main__':
-    game = Tetris()
+    parser = argparse.ArgumentParser(description='俄罗斯方块')
+    parser.add_argument('--width', type=int, default=GRID_WIDTH, help='棋盘列数')
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT, help='棋盘行数')
+    args = parser.parse_args()
+    game = Tetris(args.width, args.height)
     game.run()
+    game.store.close()
     pygame.quit()# û
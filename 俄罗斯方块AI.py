@@ -0,0 +1,193 @@
+from collections import OrderedDict
+
+from 俄罗斯方块引擎 import (
+    ACTION_DROP, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_TICK,
+    BIT_PADDING, FLOOR_ROWS, ROTATIONS, SPAWN_OFFSETS,
+)
+
+# 俄罗斯方块机器人：枚举当前方块所有可达的落点，用加权特征给落点后的棋盘打分，选分数最高的落点
+# 搜索只在位棋盘的副本上进行，不修改引擎的棋盘
+
+# 特征权重：总高度、消行数、空洞数、高度差
+DEFAULT_WEIGHTS = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+
+
+def board_rows(engine):
+    """取出引擎棋盘的行掩码（不含地板），未启用位棋盘时从颜色网格计算"""
+    if engine.rows is not None:
+        return tuple(engine.rows[:engine.height])
+    return tuple(
+        engine.empty_row | sum(1 << (x + BIT_PADDING) for x, cell in enumerate(row) if cell)
+        for row in engine.grid
+    )
+
+
+def board_features(rows, width, height):
+    """一次扫描计算各列高度和空洞数，返回(总高度, 空洞数, 高度差)"""
+    field = ((1 << width) - 1) << BIT_PADDING
+    heights = [0] * width
+    cover = 0
+    holes = 0
+    for y, row in enumerate(rows):
+        row &= field
+        # 上方已有方块而本格为空的就是空洞
+        holes += (cover & ~row).bit_count()
+        new = row & ~cover
+        if new:
+            cover |= new
+            column_height = height - y
+            while new:
+                bit = new & -new
+                heights[bit.bit_length() - 1 - BIT_PADDING] = column_height
+                new ^= bit
+    bumpiness = sum(abs(heights[i] - heights[i + 1]) for i in range(width - 1))
+    return sum(heights), holes, bumpiness
+
+
+class TetrisBot:
+    """带置换表的落点搜索，可选利用下一个方块做一层前瞻"""
+
+    def __init__(self, weights=None, cache_size=200000, lookahead=True):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.cache_size = cache_size
+        self.lookahead = lookahead
+        # 置换表：(棋盘, 下一个方块) -> 评分，按最近使用淘汰
+        self.cache = OrderedDict()
+        self.evaluated = 0  # 累计评估的落点数
+
+    def placements(self, rows, width, height, shape_id, start_x=None, start_y=0):
+        """枚举从初始状态（默认出生位置）先旋转、再横移、最后落到底能到达的所有落点
+
+        rows是不含地板的行掩码，返回[(旋转状态, x, 消行数, 消行后的棋盘), ...]
+        """
+        empty_row = (((1 << (width + 2 * BIT_PADDING)) - 1) &
+                     ~(((1 << width) - 1) << BIT_PADDING))
+        full_row = (1 << (width + 2 * BIT_PADDING)) - 1
+        board = list(rows) + [full_row] * FLOOR_ROWS
+
+        # 第一个非空行以上的位置一定放得下，从那里开始下落
+        first_filled = height
+        for y, row in enumerate(rows):
+            if row != empty_row:
+                first_filled = y
+                break
+
+        def fits(masks, x, top):
+            shift = x + BIT_PADDING
+            for i, mask in enumerate(masks):
+                if mask and (mask << shift) & (board[top + i] if top + i >= 0 else empty_row):
+                    return False
+            return True
+
+        spawn_x = width // 2 - SPAWN_OFFSETS[shape_id] if start_x is None else start_x
+        results = []
+        seen = set()
+        for rotation, state in enumerate(ROTATIONS[shape_id]):
+            # 旋转必须在初始位置逐次有效
+            masks = state.masks
+            if not fits(masks, spawn_x, start_y):
+                break
+
+            # 从初始位置向左右扫，直到撞墙或撞到方块
+            xs = [spawn_x]
+            x = spawn_x - 1
+            while fits(masks, x, start_y):
+                xs.append(x)
+                x -= 1
+            x = spawn_x + 1
+            while fits(masks, x, start_y):
+                xs.append(x)
+                x += 1
+
+            for x in xs:
+                top = max(start_y, first_filled - state.height)
+                while fits(masks, x, top + 1):
+                    top += 1
+
+                new_rows = board[:height]
+                shift = x + BIT_PADDING
+                for i, mask in enumerate(masks):
+                    if mask:
+                        new_rows[top + i] |= mask << shift
+                kept = [row for row in new_rows if row != full_row]
+                lines = height - len(kept)
+                if lines:
+                    kept = [empty_row] * lines + kept
+                kept = tuple(kept)
+
+                # 同一个最终局面只保留一次（例如O方块的四个旋转状态）
+                if kept in seen:
+                    continue
+                seen.add(kept)
+                results.append((rotation, x, lines, kept))
+        return results
+
+    def evaluate(self, rows, width, height, lines, next_shape=None):
+        """给落点后的棋盘打分；给出下一个方块时取其最佳落点的分数"""
+        key = (rows, next_shape)
+        score = self.cache.get(key)
+        if score is None:
+            if next_shape is None:
+                aggregate, holes, bumpiness = board_features(rows, width, height)
+                w = self.weights
+                score = (w['height'] * aggregate + w['holes'] * holes +
+                         w['bumpiness'] * bumpiness)
+                self.evaluated += 1
+            else:
+                best = None
+                for _, _, next_lines, next_rows in self.placements(rows, width, height, next_shape):
+                    value = self.evaluate(next_rows, width, height, next_lines)
+                    if best is None or value > best:
+                        best = value
+                # 下一个方块放不下时视为最差局面
+                score = best if best is not None else float('-inf')
+            self.cache[key] = score
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return score + self.weights['lines'] * lines
+
+    def choose(self, engine, next_shape=None):
+        """为引擎当前的方块选择最佳落点，返回(旋转状态, x)，无处可放时返回None
+
+        不给next_shape时从引擎的预览队列中取下一个方块做前瞻。
+        """
+        if not self.lookahead:
+            next_shape = None
+        elif next_shape is None:
+            next_shape = engine.queue.next_shape()
+        rows = board_rows(engine)
+        width, height = engine.width, engine.height
+        piece = engine.current_piece
+        best = None
+        best_score = None
+        # 旋转状态按刚出生（未旋转）的方块计算
+        for rotation, x, lines, new_rows in self.placements(
+                rows, width, height, piece.shape_id, piece.x, piece.y):
+            score = self.evaluate(new_rows, width, height, lines, next_shape)
+            if best is None or score > best_score:
+                best = (rotation, x)
+                best_score = score
+        return best
+
+    def actions(self, engine, next_shape=None):
+        """生成把当前方块移动到最佳落点并落到底的动作序列（不含锁定）"""
+        best = self.choose(engine, next_shape)
+        if best is None:
+            return [ACTION_DROP]
+        rotation, x = best
+        piece = engine.current_piece
+        shift = x - piece.x
+        return ([ACTION_ROTATE] * ((rotation - piece.rotation) & 3) +
+                [ACTION_RIGHT if shift > 0 else ACTION_LEFT] * abs(shift) +
+                [ACTION_DROP])
+
+    def play(self, engine, next_shape=None):
+        """走完一个方块：移动、落下并锁定，返回消除的行数"""
+        return engine.step_many(self.actions(engine, next_shape) + [ACTION_TICK])
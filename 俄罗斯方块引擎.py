@@ -0,0 +1,500 @@
+import random
+from collections import deque, namedtuple
+from itertools import islice
+
+# 俄罗斯方块的纯逻辑核心，不依赖pygame，可用于机器人对局和回归测试
+
+# 棋盘尺寸
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# 颜色定义
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+CYAN = (0, 255, 255)
+MAGENTA = (255, 0, 255)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
+
+# 修改方块形状定义，确保每个形状都是二维列表
+SHAPES = [
+    [[1, 1, 1, 1],
+     [0, 0, 0, 0]],  # I
+
+    [[1, 1],
+     [1, 1]],  # O
+
+    [[1, 1, 1],
+     [0, 1, 0]],  # T
+
+    [[1, 1, 1],
+     [1, 0, 0]],  # L
+
+    [[1, 1, 1],
+     [0, 0, 1]],  # J
+
+    [[1, 1, 0],
+     [0, 1, 1]],  # S
+
+    [[0, 1, 1],
+     [1, 1, 0]]   # Z
+]
+
+COLORS = [CYAN, YELLOW, MAGENTA, ORANGE, BLUE, GREEN, RED]
+
+# 动作定义
+ACTION_NONE = 0
+ACTION_LEFT = 1    # 左移一格
+ACTION_RIGHT = 2   # 右移一格
+ACTION_DOWN = 3    # 下移一格
+ACTION_ROTATE = 4  # 顺时针旋转
+ACTION_DROP = 5    # 直接落到底（不锁定）
+ACTION_TICK = 6    # 重力下落一格，落不下时锁定方块
+
+# 预览队列默认显示的方块数
+PREVIEW_SIZE = 5
+
+# 位棋盘两侧的墙宽度，需不小于方块最大宽度，保证越界的方块一定撞到墙
+BIT_PADDING = 4
+# 位棋盘底部额外的实心行数
+FLOOR_ROWS = 4
+
+
+def rotate_shape(shape):
+    """顺时针旋转形状矩阵，返回新矩阵"""
+    rows = len(shape)
+    cols = len(shape[0])
+    rotated = [[0 for _ in range(rows)] for _ in range(cols)]
+    for r in range(rows):
+        for c in range(cols):
+            rotated[c][rows-1-r] = shape[r][c]
+    return rotated
+
+
+def shape_masks(shape):
+    """计算形状每一行的位掩码，第j列对应第j位"""
+    return tuple(sum(1 << j for j, cell in enumerate(row) if cell) for row in shape)
+
+
+# 一个旋转状态：格子偏移、形状矩阵尺寸、实际格子的包围盒、行掩码、
+# 非空行的(行偏移, 掩码)和每列最低格子的偏移
+Rotation = namedtuple('Rotation', 'cells width height bbox masks mask_rows bottoms')
+
+# 棋盘特征：总高度、空洞数、高度差和最大高度
+BoardFeatures = namedtuple('BoardFeatures', 'aggregate_height holes bumpiness max_height')
+
+
+def build_rotation(shape):
+    """根据形状矩阵生成旋转状态"""
+    cells = tuple((j, i) for i, row in enumerate(shape) for j, cell in enumerate(row) if cell)
+    xs = [dx for dx, _ in cells]
+    ys = [dy for _, dy in cells]
+    masks = shape_masks(shape)
+    bottoms = {}
+    for dx, dy in cells:
+        bottoms[dx] = max(bottoms.get(dx, dy), dy)
+    return Rotation(cells, len(shape[0]), len(shape),
+                    (min(xs), min(ys), max(xs), max(ys)), masks,
+                    tuple((i, mask) for i, mask in enumerate(masks) if mask),
+                    tuple(sorted(bottoms.items())))
+
+
+# 导入时一次性算好每个形状的四个旋转状态，ROTATIONS[形状编号][旋转状态]
+ROTATIONS = []
+for _shape in SHAPES:
+    _states = []
+    for _ in range(4):
+        _states.append(build_rotation(_shape))
+        _shape = rotate_shape(_shape)
+    ROTATIONS.append(tuple(_states))
+ROTATIONS = tuple(ROTATIONS)
+del _shape, _states
+
+# 出生时相对棋盘中线的横向偏移
+SPAWN_OFFSETS = tuple(len(shape[0]) // 2 for shape in SHAPES)
+
+
+class Piece:
+    """活动方块：形状编号、旋转状态和位置，可哈希，供搜索去重使用"""
+
+    __slots__ = ('shape_id', 'rotation', 'x', 'y')
+
+    def __init__(self, shape_id, rotation=0, x=0, y=0):
+        self.shape_id = shape_id
+        self.rotation = rotation
+        self.x = x
+        self.y = y
+
+    @property
+    def state(self):
+        return ROTATIONS[self.shape_id][self.rotation]
+
+    @property
+    def cells(self):
+        return ROTATIONS[self.shape_id][self.rotation].cells
+
+    @property
+    def masks(self):
+        return ROTATIONS[self.shape_id][self.rotation].masks
+
+    @property
+    def color(self):
+        return COLORS[self.shape_id]
+
+    def key(self):
+        return (self.shape_id, self.rotation, self.x, self.y)
+
+    def copy(self):
+        return Piece(self.shape_id, self.rotation, self.x, self.y)
+
+    def reset(self, shape_id, rotation=0, x=0, y=0):
+        """原地换成另一个方块，生成新方块时不用分配对象"""
+        self.shape_id = shape_id
+        self.rotation = rotation
+        self.x = x
+        self.y = y
+
+    # 放进集合或字典后不要再修改位置
+    def __eq__(self, other):
+        return isinstance(other, Piece) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return 'Piece(%d, %d, %d, %d)' % self.key()
+
+
+class UniformRandomizer:
+    """每个方块独立均匀随机"""
+
+    def generate(self, rng, count):
+        return [rng.randint(0, len(SHAPES) - 1) for _ in range(count)]
+
+
+class BagRandomizer:
+    """7-bag：每次把七种方块打乱后依次发出，任意两个同种方块之间最多隔12个"""
+
+    def generate(self, rng, count):
+        pieces = []
+        bag = list(range(len(SHAPES)))
+        while len(pieces) < count:
+            rng.shuffle(bag)
+            pieces.extend(bag)
+        return pieces
+
+
+class HistoryRandomizer:
+    """记住最近发出的几个方块，抽到其中之一时重抽，最多重抽rolls次"""
+
+    def __init__(self, history=4, rolls=4):
+        self.history = deque((6, 6, 5, 5)[:history], maxlen=history)  # 开局先避开S和Z
+        self.rolls = rolls
+
+    def generate(self, rng, count):
+        pieces = []
+        for _ in range(count):
+            for _ in range(self.rolls):
+                shape_idx = rng.randint(0, len(SHAPES) - 1)
+                if shape_idx not in self.history:
+                    break
+            self.history.append(shape_idx)
+            pieces.append(shape_idx)
+        return pieces
+
+
+# 随机器名称，在回放中按下标记录
+RANDOMIZERS = {
+    'uniform': UniformRandomizer,
+    'bag': BagRandomizer,
+    'history': HistoryRandomizer,
+}
+RANDOMIZER_NAMES = tuple(RANDOMIZERS)
+
+
+class PieceQueue:
+    """后续方块队列：不够预览时一次生成一批，出队和预览都不分配方块对象"""
+
+    # 每次补充的方块数（7-bag会补齐整袋）
+    BATCH = 70
+
+    def __init__(self, randomizer, rng, preview=PREVIEW_SIZE):
+        self.randomizer = randomizer
+        self.rng = rng
+        self.preview = preview
+        self.items = deque()
+
+    def refill(self, needed):
+        while len(self.items) < needed:
+            self.items.extend(self.randomizer.generate(self.rng, self.BATCH))
+
+    def pop(self):
+        """取出下一个方块的形状编号"""
+        if len(self.items) <= self.preview:
+            self.refill(self.preview + 1)
+        return self.items.popleft()
+
+    def peek(self, count=None):
+        """返回接下来count个（默认预览数量）方块的形状编号"""
+        count = self.preview if count is None else count
+        if len(self.items) < count:
+            self.refill(count)
+        return tuple(islice(self.items, count))
+
+    def next_shape(self):
+        if not self.items:
+            self.refill(1)
+        return self.items[0]
+
+
+class TetrisEngine:
+    """俄罗斯方块逻辑核心：棋盘、方块、消行和计分"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None, bitboard=False,
+                 randomizer='uniform', preview=PREVIEW_SIZE):
+        self.width = width
+        self.height = height
+        self.randomizer = randomizer  # RANDOMIZERS中的名称
+        self.preview = preview
+        # 整局复用同一个活动方块对象
+        self.current_piece = Piece(0)
+
+        # 位棋盘：每行一个整数，两侧的墙和底部的地板都预先置位
+        self.bitboard = bitboard
+        self.full_row = (1 << (width + 2 * BIT_PADDING)) - 1
+        self.empty_row = self.full_row & ~(((1 << width) - 1) << BIT_PADDING)
+        self.rows = None
+
+        # 已锁定方块每变化一次加一，渲染器据此判断是否需要重绘棋盘
+        self.board_version = 0
+
+        self.reset_game(seed)
+
+    def reset_game(self, seed=None):
+        """开始新的一局；每局使用自己的随机数生成器，不给种子时随机生成一个，保证整局可以复现"""
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.ticks = 0  # 累计的重力下落次数，回放以此为时间轴
+        self.queue = PieceQueue(RANDOMIZERS[self.randomizer](), self.rng, self.preview)
+        self.grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
+        if self.bitboard:
+            self.rows = [self.empty_row] * self.height + [self.full_row] * FLOOR_ROWS
+        # 随放置和消行增量维护的计数：各列高度、各行的方块数和空洞总数；
+        # 位棋盘的行掩码已经能判断满行，不再单独维护行计数（需要时用掩码的bit_count）
+        self.heights = [0] * self.width
+        self.row_counts = None if self.bitboard else [0] * self.height
+        self.holes = 0
+        self.board_version += 1
+        self.new_piece()
+        self.game_over = False
+        self.score = 0
+        self.lines = 0   # 累计消除行数
+        self.pieces = 0  # 累计锁定的方块数
+
+    def new_piece(self):
+        """从队列取出下一个方块放到出生位置，复用当前方块对象"""
+        shape_idx = self.queue.pop()
+        piece = self.current_piece
+        piece.reset(shape_idx, 0, self.width // 2 - SPAWN_OFFSETS[shape_idx], 0)
+        return piece
+
+    def rotate_piece(self):
+        # 直接切换到下一个预先算好的旋转状态
+        piece = self.current_piece
+        original_rotation = piece.rotation
+        piece.rotation = (original_rotation + 1) & 3
+
+        # 如果旋转后的位置无效，则恢复原始状态
+        if not self.valid_move(piece, 0, 0):
+            piece.rotation = original_rotation
+
+    def valid_move(self, piece, x, y):
+        if self.rows is not None:
+            # 位棋盘：每个非空行一次与运算，墙和地板已经包含在行里
+            # 方块从第0行出生且只会下移，行号不会为负（万一为负会取到地板行，按碰撞处理）
+            rows = self.rows
+            shift = piece.x + x + BIT_PADDING
+            top = piece.y + y
+            for i, mask in ROTATIONS[piece.shape_id][piece.rotation].mask_rows:
+                if (mask << shift) & rows[top + i]:
+                    return False
+            return True
+
+        base_x = piece.x + x
+        base_y = piece.y + y
+        for dx, dy in ROTATIONS[piece.shape_id][piece.rotation].cells:
+            new_x = base_x + dx
+            new_y = base_y + dy
+            if (new_x < 0 or new_x >= self.width or
+                new_y >= self.height or
+                (new_y >= 0 and self.grid[new_y][new_x])):
+                return False
+        return True
+
+    def sync_board(self):
+        """直接修改self.grid之后调用，按grid重建位棋盘、列高度、行计数和空洞数"""
+        grid = self.grid
+        if self.rows is not None:
+            self.rows[:self.height] = [
+                self.empty_row | sum(1 << (x + BIT_PADDING) for x, cell in enumerate(row) if cell)
+                for row in grid
+            ]
+        else:
+            self.row_counts[:] = [sum(1 for cell in row if cell) for row in grid]
+        self.holes = 0
+        for x in range(self.width):
+            column_height = 0
+            for y in range(self.height):
+                if grid[y][x]:
+                    if not column_height:
+                        column_height = self.height - y
+                elif column_height:
+                    self.holes += 1
+            self.heights[x] = column_height
+        self.board_version += 1
+
+    def drop_position(self, piece=None):
+        """返回方块（默认当前方块）直接落到底时的y坐标，不移动方块
+
+        方块每列最低的格子都在该列顶部之上时，落点由列高度直接算出，只需O(方块宽度)；
+        方块伸进了悬空方块下面时才逐行检查。
+        """
+        if piece is None:
+            piece = self.current_piece
+        heights = self.heights
+        # 每列能下落的行数：最低格子与该列顶部之间的空格数
+        limit = self.height - 1 - piece.y
+        distance = min(limit - heights[piece.x + dx] - dy
+                       for dx, dy in ROTATIONS[piece.shape_id][piece.rotation].bottoms)
+        if distance >= 0:
+            return piece.y + distance
+        distance = 0
+        while self.valid_move(piece, 0, distance + 1):
+            distance += 1
+        return piece.y + distance
+
+    def features(self):
+        """由增量维护的计数得到棋盘特征，前三项与俄罗斯方块AI.board_features一致"""
+        heights = self.heights
+        bumpiness = sum(abs(heights[i] - heights[i + 1]) for i in range(self.width - 1))
+        return BoardFeatures(sum(heights), self.holes, bumpiness, max(heights))
+
+    def place_piece(self):
+        piece = self.current_piece
+        state = ROTATIONS[piece.shape_id][piece.rotation]
+        color = COLORS[piece.shape_id]
+        heights = self.heights
+        # 格子按行从上到下排列，倒序处理保证同一列先放下面的格子
+        for dx, dy in reversed(state.cells):
+            x = piece.x + dx
+            y = piece.y + dy
+            self.grid[y][x] = color
+            cell_height = self.height - y
+            if cell_height > heights[x]:
+                # 原来的顶部与新格子之间的空格成为空洞
+                self.holes += cell_height - 1 - heights[x]
+                heights[x] = cell_height
+            else:
+                # 从侧面塞进了空洞
+                self.holes -= 1
+        if self.rows is not None:
+            shift = piece.x + BIT_PADDING
+            for i, mask in state.mask_rows:
+                self.rows[piece.y + i] |= mask << shift
+        else:
+            for dx, dy in state.cells:
+                self.row_counts[piece.y + dy] += 1
+        self.board_version += 1
+
+    def clear_lines(self):
+        width = self.width
+        rows = self.rows
+        if rows is not None:
+            # 位棋盘：满行就是等于full_row的行，地板也是；没有满行时一次C层面的计数就能返回
+            full_row = self.full_row
+            if rows.count(full_row) == FLOOR_ROWS:
+                return 0
+            lines = rows
+            full = [y for y in range(self.height) if rows[y] == full_row]
+            empty = self.empty_row
+        else:
+            # 满行就是方块数等于棋盘宽度的行，不用扫描格子
+            lines = self.row_counts
+            if width not in lines:
+                return 0
+            full = [y for y, count in enumerate(lines) if count == width]
+            empty = 0
+
+        # 从下往上原地删掉满行，再在顶部补上同样数量的空行
+        grid = self.grid
+        for y in reversed(full):
+            del grid[y]
+            del lines[y]
+        lines_cleared = len(full)
+        grid[0:0] = [[0] * width for _ in range(lines_cleared)]
+        lines[0:0] = [empty] * lines_cleared
+
+        # 满行都在各列顶部或以下，列高度先减去消除的行数；
+        # 顶部格子被消掉的列再向下找新的顶部，途中经过的空洞不再是空洞
+        grid = self.grid
+        heights = self.heights
+        for x in range(width):
+            column_height = heights[x] - lines_cleared
+            while column_height > 0 and not grid[self.height - column_height][x]:
+                column_height -= 1
+                self.holes -= 1
+            heights[x] = column_height
+        self.board_version += 1
+        return lines_cleared
+
+    def lock_piece(self):
+        """锁定当前方块、消行并生成下一个方块，返回消除的行数"""
+        self.place_piece()
+        lines = self.clear_lines()
+        self.score += lines * 100
+        self.lines += lines
+        self.pieces += 1
+        self.new_piece()
+        if not self.valid_move(self.current_piece, 0, 0):
+            self.game_over = True
+        return lines
+
+    def step(self, action):
+        """执行一个动作，返回本步消除的行数"""
+        if self.game_over:
+            return 0
+
+        piece = self.current_piece
+        if action == ACTION_TICK:
+            self.ticks += 1
+            if self.valid_move(piece, 0, 1):
+                piece.y += 1
+            else:
+                return self.lock_piece()
+        elif action == ACTION_LEFT:
+            if self.valid_move(piece, -1, 0):
+                piece.x -= 1
+        elif action == ACTION_RIGHT:
+            if self.valid_move(piece, 1, 0):
+                piece.x += 1
+        elif action == ACTION_DOWN:
+            if self.valid_move(piece, 0, 1):
+                piece.y += 1
+        elif action == ACTION_ROTATE:
+            self.rotate_piece()
+        elif action == ACTION_DROP:
+            piece.y = self.drop_position(piece)
+        return 0
+
+    def step_many(self, actions):
+        """依次执行一批动作，游戏结束时提前停止，返回消除的总行数"""
+        step = self.step
+        total = 0
+        for action in actions:
+            if self.game_over:
+                break
+            total += step(action)
+        return total
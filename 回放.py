@@ -0,0 +1,246 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+from 俄罗斯方块引擎 import ACTION_TICK, RANDOMIZER_NAMES, TetrisEngine
+from 贪吃蛇引擎 import DIRECTIONS, SnakeEngine
+
+# 紧凑的二进制回放：种子加上按逻辑tick差分编码的玩家输入，配合无渲染的引擎可以全速重放
+# 格式：MAGIC、版本号、游戏编号、变体编号（俄罗斯方块的随机器），随后是变长整数编码的种子、棋盘宽、高，
+# 然后是若干条 (tick差值, 输入) 记录，最后一条输入为END，后面跟着本局的最终得分
+# 俄罗斯方块的tick是重力下落的次数，输入是引擎动作；贪吃蛇的tick是移动的步数，输入是方向编号
+# 用法：python 回放.py [文件或目录...] -j 8 逐个重放并校验得分，不给路径时校验默认的回放目录
+# 回放默认保存在与本地存档相同的数据目录下，设置环境变量GAME_REPLAY_DIR可以改变位置
+
+MAGIC = b'GRPL'
+VERSION = 2
+
+# 游戏编号
+GAME_TETRIS = 1
+GAME_SNAKE = 2
+GAME_NAMES = {GAME_TETRIS: 'tetris', GAME_SNAKE: 'snake'}
+
+# 结束记录的输入值
+END = 0xFF
+
+# 默认的回放保存目录
+REPLAY_ENV = 'GAME_REPLAY_DIR'
+DEFAULT_REPLAY_DIR = os.path.join(
+    os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share'),
+    'pygame-games', 'replays')
+
+Replay = namedtuple('Replay', 'game variant seed width height ticks inputs end_tick score')
+
+
+def write_varint(buffer, value):
+    """以LEB128格式追加一个非负整数"""
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, pos):
+    """从pos处读取一个LEB128整数，返回(值, 新位置)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """边玩边把输入追加到字节缓冲区，每条输入只需几个字节"""
+
+    def __init__(self, game, seed, width, height, variant=0):
+        self.buffer = bytearray(MAGIC)
+        self.buffer.append(VERSION)
+        self.buffer.append(game)
+        self.buffer.append(variant)
+        write_varint(self.buffer, seed)
+        write_varint(self.buffer, width)
+        write_varint(self.buffer, height)
+        self.last_tick = 0
+        self.data = None  # 结束后的完整回放
+
+    def record(self, tick, value):
+        """记录在第tick个逻辑步之前发生的一次输入"""
+        if self.data is not None:
+            return
+        write_varint(self.buffer, tick - self.last_tick)
+        self.buffer.append(value)
+        self.last_tick = tick
+
+    def finish(self, tick, score):
+        """写入结束记录，返回回放数据；重复调用返回同一份数据"""
+        if self.data is None:
+            write_varint(self.buffer, tick - self.last_tick)
+            self.buffer.append(END)
+            write_varint(self.buffer, score)
+            self.data = bytes(self.buffer)
+        return self.data
+
+
+def decode(data):
+    """解析回放数据，格式不对时抛出ValueError"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("不是回放文件")
+    pos = len(MAGIC)
+    try:
+        version = data[pos]
+        if version != VERSION:
+            raise ValueError(f"不支持的回放版本: {version}")
+        game = data[pos + 1]
+        if game not in GAME_NAMES:
+            raise ValueError(f"未知的游戏编号: {game}")
+        variant = data[pos + 2]
+        if game == GAME_TETRIS and variant >= len(RANDOMIZER_NAMES):
+            raise ValueError(f"未知的随机器编号: {variant}")
+        pos += 3
+        seed, pos = read_varint(data, pos)
+        width, pos = read_varint(data, pos)
+        height, pos = read_varint(data, pos)
+        ticks = []
+        inputs = []
+        tick = 0
+        while True:
+            delta, pos = read_varint(data, pos)
+            tick += delta
+            value = data[pos]
+            pos += 1
+            if value == END:
+                score, pos = read_varint(data, pos)
+                if game == GAME_SNAKE and any(value >= len(DIRECTIONS) for value in inputs):
+                    raise ValueError("贪吃蛇回放中有无效的方向")
+                return Replay(game, variant, seed, width, height, ticks, inputs, tick, score)
+            ticks.append(tick)
+            inputs.append(value)
+    except IndexError:
+        raise ValueError("回放数据不完整") from None
+
+
+def replay_tetris(replay):
+    """重放俄罗斯方块：在记录的tick之间补上重力下落，返回结束时的引擎"""
+    engine = TetrisEngine(replay.width, replay.height, seed=replay.seed, bitboard=True,
+                          randomizer=RANDOMIZER_NAMES[replay.variant])
+    step = engine.step
+    for tick, action in zip(replay.ticks, replay.inputs):
+        while engine.ticks < tick and not engine.game_over:
+            step(ACTION_TICK)
+        step(action)
+    while engine.ticks < replay.end_tick and not engine.game_over:
+        step(ACTION_TICK)
+    return engine
+
+
+def replay_snake(replay):
+    """重放贪吃蛇：只在记录的tick转向，其余步保持方向，返回结束时的引擎"""
+    engine = SnakeEngine(replay.width, replay.height, seed=replay.seed)
+    step = engine.step
+    turns = dict(zip(replay.ticks, replay.inputs))
+    for tick in range(replay.end_tick):
+        if engine.game_over:
+            break
+        value = turns.get(tick)
+        step(DIRECTIONS[value] if value is not None else None)
+    return engine
+
+
+REPLAYERS = {
+    GAME_TETRIS: replay_tetris,
+    GAME_SNAKE: replay_snake,
+}
+
+
+def verify(data):
+    """重放一份回放，返回结果字典，valid表示重放得分与记录的得分一致"""
+    replay = decode(data)
+    engine = REPLAYERS[replay.game](replay)
+    return {
+        'game': GAME_NAMES[replay.game],
+        'seed': replay.seed,
+        'claimed': replay.score,
+        'score': engine.score,
+        'valid': engine.score == replay.score,
+    }
+
+
+def replay_dir():
+    return os.environ.get(REPLAY_ENV) or DEFAULT_REPLAY_DIR
+
+
+def save_replay(data, directory=None):
+    """把回放写入目录（默认为replay_dir()），文件名包含游戏、时间和种子，返回文件路径"""
+    replay = decode(data)
+    directory = directory or replay_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{GAME_NAMES[replay.game]}-{time.strftime('%Y%m%d-%H%M%S')}-{replay.seed}.rpl"
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def verify_file(path):
+    """校验一个回放文件；读不了、格式不对或无法重放时valid为False，error说明原因"""
+    try:
+        with open(path, 'rb') as f:
+            result = verify(f.read())
+    except (OSError, ValueError, LookupError) as e:
+        # 一个坏文件不能中断整批校验
+        result = {'valid': False, 'error': str(e) or type(e).__name__}
+    result['path'] = path
+    return result
+
+
+def find_replays(paths):
+    """展开命令行给出的文件和目录"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.rpl'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='全速重放回放文件并校验得分')
+    parser.add_argument('paths', nargs='*', help='回放文件或目录，默认为保存回放的目录')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='进程数，默认等于CPU核数')
+    args = parser.parse_args(argv)
+    paths = args.paths or [replay_dir()]
+    # 进程池只在命令行使用，游戏导入本模块时不需要加载
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 不存在的路径（比如还没保存过回放时的默认目录）报告一行后跳过，最后返回非零
+    missing = [path for path in paths if not os.path.exists(path)]
+    for path in missing:
+        print(f"找不到回放文件或目录: {path}", file=sys.stderr)
+    files = list(find_replays(path for path in paths if path not in missing))
+    if missing and not files:
+        return 1
+    start = time.perf_counter()
+    invalid = broken = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(verify_file, files, chunksize=16):
+            if 'error' in result:
+                broken += 1
+                print(f"{result['path']}: 无法重放，{result['error']}")
+            elif not result['valid']:
+                invalid += 1
+                print(f"{result['path']}: 记录得分 {result['claimed']}，重放得分 {result['score']}")
+    elapsed = time.perf_counter() - start
+    print(f"重放 {len(files)} 个回放，{invalid} 个不一致，{broken} 个无法重放，用时 {elapsed:.2f} 秒",
+          file=sys.stderr)
+    return 1 if invalid or broken or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,470 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 渲染用例使用SDL的dummy驱动，必须在导入pygame之前设置
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+import 俄罗斯方块
+import 贪吃蛇
+from 俄罗斯方块引擎 import (
+    ACTION_DROP, ACTION_LEFT, ACTION_RIGHT, COLORS, TetrisEngine,
+)
+from 贪吃蛇AI import hamiltonian_cycle
+from 贪吃蛇引擎 import FreeCells
+from 字体 import CACHE_ENV
+from 存档 import SCORE_ENV
+from 回放 import REPLAY_ENV
+
+# 模拟和渲染热点的基准测试，无窗口运行
+# 用法：python 基准测试.py --save bench.json            保存基线
+#       python 基准测试.py --compare bench.json -t 0.2  比基线慢20%以上的用例返回非零
+#       python 基准测试.py --startup                    冷/热启动到第一帧的耗时
+# 每个用例报告每秒操作数和单次耗时（毫秒）的分位数；渲染用例的单次操作就是一帧
+
+# 每个用例默认测量的时长（秒）
+DEFAULT_DURATION = 0.5
+# 批量计时时每个样本的目标时长（秒），让很快的操作也能准确计时
+SAMPLE_TIME = 0.001
+# 默认的回归阈值：比基线慢这个比例以上视为回归
+DEFAULT_THRESHOLD = 0.2
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """注册一个用例：setup返回(操作, 准备函数)，准备函数在每次操作前调用且不计时，可以为None"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def measure(op, prepare=None, duration=DEFAULT_DURATION):
+    """测量op的耗时，返回每次操作的耗时样本（秒）和总操作数"""
+    op()  # 预热
+    samples = []
+    calls = 0
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        perf_counter = time.perf_counter
+        if prepare is not None:
+            # 每次操作前都要恢复状态，只能逐次计时
+            deadline = perf_counter() + duration
+            while perf_counter() < deadline:
+                prepare()
+                start = perf_counter()
+                op()
+                samples.append(perf_counter() - start)
+            calls = len(samples)
+        else:
+            # 翻倍直到一个批次足够长，再按批次取样
+            inner = 1
+            while True:
+                start = perf_counter()
+                for _ in range(inner):
+                    op()
+                elapsed = perf_counter() - start
+                if elapsed >= SAMPLE_TIME or inner >= 1 << 20:
+                    break
+                inner *= 2
+            deadline = perf_counter() + duration
+            while perf_counter() < deadline:
+                start = perf_counter()
+                for _ in range(inner):
+                    op()
+                samples.append((perf_counter() - start) / inner)
+            calls = len(samples) * inner
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples, calls
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def run(names, duration=DEFAULT_DURATION):
+    """运行选中的用例，返回{名称: 结果}"""
+    results = {}
+    for name in names:
+        op, prepare = BENCHMARKS[name]()
+        samples, calls = measure(op, prepare, duration)
+        if prepare is None:
+            total = statistics.fmean(samples) * calls
+        else:
+            total = sum(samples)
+        samples.sort()
+        results[name] = {
+            'ops_per_sec': calls / total,
+            'p50_ms': percentile(samples, 0.5) * 1000,
+            'p90_ms': percentile(samples, 0.9) * 1000,
+            'p99_ms': percentile(samples, 0.99) * 1000,
+            'samples': len(samples),
+        }
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """和基线比较每秒操作数，返回回归的用例[(名称, 基线, 当前, 变化比例)]"""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = result['ops_per_sec'] / old['ops_per_sec'] - 1
+        if change < -threshold:
+            regressions.append((name, old['ops_per_sec'], result['ops_per_sec'], change))
+    return regressions
+
+
+# ---------------- 俄罗斯方块 ----------------
+
+def load_board(engine, filled_rows, density, seed=0, holes=True):
+    """用随机方块填满棋盘底部的filled_rows行，每行至少留一个空格，并同步位棋盘和各项计数"""
+    rng = random.Random(seed)
+    width, height = engine.width, engine.height
+    for y in range(height):
+        row = [0] * width
+        if y >= height - filled_rows:
+            row = [rng.choice(COLORS) if rng.random() < density else 0 for _ in range(width)]
+            if holes:
+                row[rng.randrange(width)] = 0
+        engine.grid[y] = row
+    engine.sync_board()
+
+
+def snapshot_board(engine):
+    grid = [row[:] for row in engine.grid]
+
+    def restore():
+        engine.grid[:] = [row[:] for row in grid]
+        engine.sync_board()
+    return restore
+
+
+for _bitboard in (False, True):
+    _suffix = '[bitboard]' if _bitboard else ''
+
+    @benchmark('tetris.valid_move' + _suffix)
+    def _valid_move(bitboard=_bitboard):
+        engine = TetrisEngine(seed=0, bitboard=bitboard)
+        load_board(engine, 10, 0.7)
+        piece = engine.current_piece
+        piece.y = 8
+        valid_move = engine.valid_move
+        return (lambda: valid_move(piece, 0, 1)), None
+
+    @benchmark('tetris.rotate_piece' + _suffix)
+    def _rotate_piece(bitboard=_bitboard):
+        engine = TetrisEngine(seed=0, bitboard=bitboard)
+        load_board(engine, 10, 0.7)
+        engine.current_piece.y = 4
+        return engine.rotate_piece, None
+
+    for _lines in range(1, 5):
+        @benchmark(f'tetris.clear_lines[{_lines}]' + _suffix)
+        def _clear_lines(bitboard=_bitboard, lines=_lines):
+            # 整个棋盘都是带空洞的垃圾行，底部lines行是满行
+            engine = TetrisEngine(seed=0, bitboard=bitboard)
+            load_board(engine, engine.height, 0.9)
+            for y in range(engine.height - lines, engine.height):
+                engine.grid[y] = [COLORS[0]] * engine.width
+            engine.sync_board()
+            restore = snapshot_board(engine)
+            assert engine.clear_lines() == lines
+            return engine.clear_lines, restore
+
+    @benchmark('tetris.hard_drop' + _suffix)
+    def _hard_drop(bitboard=_bitboard):
+        # 从出生位置落到底部有10行方块的棋盘上
+        engine = TetrisEngine(seed=0, bitboard=bitboard)
+        load_board(engine, 10, 0.7)
+        piece = engine.current_piece
+
+        def prepare():
+            piece.y = 0
+        return (lambda: engine.step(ACTION_DROP)), prepare
+
+
+def tetris_window():
+    """创建窗口版俄罗斯方块，棋盘下半部分已有方块"""
+    game = 俄罗斯方块.Tetris()
+    load_board(game, 10, 0.7)
+    game.current_piece.y = 3
+    game.draw()
+    return game
+
+
+@benchmark('tetris.draw')
+def _tetris_draw():
+    # 常规帧：只有活动方块移动
+    game = tetris_window()
+    moves = [ACTION_LEFT, ACTION_RIGHT]
+    counter = [0]
+
+    def prepare():
+        counter[0] += 1
+        game.step(moves[counter[0] & 1])
+    return game.draw, prepare
+
+
+@benchmark('tetris.draw[board]')
+def _tetris_draw_board():
+    # 方块锁定后的帧：重画整个棋盘
+    game = tetris_window()
+
+    def prepare():
+        game.board_version += 1
+    return game.draw, prepare
+
+
+@benchmark('tetris.draw[full]')
+def _tetris_draw_full():
+    # 整屏重绘
+    game = tetris_window()
+
+    def prepare():
+        game.full_redraw = True
+        game.board_version += 1
+    return game.draw, prepare
+
+
+# ---------------- 贪吃蛇 ----------------
+
+def lay_snake(snake, length):
+    """让蛇沿哈密顿回路铺开length格，返回回路上每格的下一格"""
+    cycle = hamiltonian_cycle(snake.width, snake.height)
+    body = cycle[:length][::-1]  # 蛇头在回路上最靠前
+    snake.positions.clear()
+    snake.positions.extend(body)
+    snake.occupied = set(body)
+    snake.free_cells = FreeCells(cell for cell in cycle if cell not in snake.occupied)
+    snake.length = length
+    return {cell: cycle[(i + 1) % len(cycle)] for i, cell in enumerate(cycle)}
+
+
+def snake_window(length=200, width=贪吃蛇.PLAYABLE_WIDTH, height=贪吃蛇.PLAYABLE_HEIGHT):
+    game = 贪吃蛇.Game(width, height)
+    following = lay_snake(game.snake, length)
+    game.reset_food()
+    if game.pixel_board is not None:
+        game.pixel_board.rebuild(game.snake)
+    return game, following
+
+
+@benchmark('snake.update')
+def _snake_update():
+    game, following = snake_window()
+    snake = game.snake
+
+    def prepare():
+        head_x, head_y = snake.positions[0]
+        next_x, next_y = following[snake.positions[0]]
+        snake.direction = (next_x - head_x, next_y - head_y)
+    return snake.update, prepare
+
+
+@benchmark('snake.reset_food[nearly full]')
+def _snake_reset_food():
+    # 只剩5个空格，随机撒点会几乎总是失败
+    game = 贪吃蛇.Game()
+    snake = game.snake
+    lay_snake(snake, snake.width * snake.height - 5)
+    return game.reset_food, None
+
+
+@benchmark('snake.render')
+def _snake_render():
+    game, _ = snake_window()
+    return (lambda: game.snake.render(game.screen, game.sprites)), None
+
+
+@benchmark('snake.step[500x500]')
+def _snake_step_large():
+    # 大棋盘：移动一步并增量更新像素画布
+    game, following = snake_window(length=100000, width=500, height=500)
+    snake = game.snake
+    board = game.pixel_board
+
+    def op():
+        head = snake.positions[0]
+        tail = snake.positions[-1]
+        snake.update()
+        board.step(snake, head, tail)
+
+    def prepare():
+        head_x, head_y = snake.positions[0]
+        next_x, next_y = following[snake.positions[0]]
+        snake.direction = (next_x - head_x, next_y - head_y)
+    return op, prepare
+
+
+@benchmark('snake.draw_sprites[500x500]')
+def _snake_draw_sprites_large():
+    # 像素画布模式：每帧的绘制耗时与棋盘面积和蛇长无关
+    game, _ = snake_window(length=100000, width=500, height=500)
+    return game.draw_sprites, None
+
+
+@benchmark('snake.draw_game_area')
+def _snake_draw_game_area():
+    game, _ = snake_window()
+    return game.draw_game_area, None
+
+
+@benchmark('snake.draw_instructions')
+def _snake_draw_instructions():
+    game, _ = snake_window()
+    return game.draw_instructions, None
+
+
+for _mode in 贪吃蛇.GRADIENT_MODES:
+    @benchmark(f'snake.gradient[{_mode}]')
+    def _snake_gradient(mode=_mode):
+        # 不经过缓存，测量生成一张控制面板大小的渐变
+        return (lambda: 贪吃蛇.render_gradient(300, 650, (40, 40, 45), (30, 30, 35), mode)), None
+
+
+# ---------------- 启动 ----------------
+
+# 在新进程中从导入pygame到画出第一帧的脚本
+STARTUP_SCRIPTS = {
+    'snake': '''
+import 贪吃蛇
+game = 贪吃蛇.Game()
+game.draw_game_area()
+game.draw_sprites()
+game.draw_instructions()
+pygame.display.flip()
+''',
+    'tetris': '''
+import 俄罗斯方块
+game = 俄罗斯方块.Tetris()
+game.draw()
+''',
+}
+
+STARTUP_TEMPLATE = '''
+import time
+start = time.perf_counter()
+import pygame
+{script}
+print(time.perf_counter() - start)
+'''
+
+
+def startup(game, runs=5):
+    """测量新进程中导入到第一帧的耗时（毫秒），返回(冷启动中位数, 热启动中位数)
+
+    冷启动前删除字体缓存，热启动复用上一次写入的缓存；缓存、存档和回放都放在临时目录，不影响真实的文件。
+    """
+    code = STARTUP_TEMPLATE.format(script=STARTUP_SCRIPTS[game])
+    here = os.path.dirname(os.path.abspath(__file__))
+    cold, warm = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, 'fonts.json')
+        env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+        env[CACHE_ENV] = cache
+        env[SCORE_ENV] = os.path.join(tmp, 'scores.db')
+        env[REPLAY_ENV] = os.path.join(tmp, 'replays')
+        for _ in range(runs):
+            for samples in (cold, warm):
+                if samples is cold and os.path.exists(cache):
+                    os.remove(cache)
+                output = subprocess.run([sys.executable, '-c', code], cwd=here, env=env,
+                                        capture_output=True, text=True, check=True).stdout
+                samples.append(float(output.split()[-1]) * 1000)
+    return statistics.median(cold), statistics.median(warm)
+
+
+@contextlib.contextmanager
+def scratch_files():
+    """运行期间把存档、回放和字体缓存指向临时目录，进程内的用例不会写入真实的文件"""
+    saved = {key: os.environ.get(key) for key in (SCORE_ENV, REPLAY_ENV, CACHE_ENV)}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[SCORE_ENV] = os.path.join(tmp, 'scores.db')
+        os.environ[REPLAY_ENV] = os.path.join(tmp, 'replays')
+        os.environ[CACHE_ENV] = os.path.join(tmp, 'fonts.json')
+        try:
+            yield tmp
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='模拟和渲染热点的基准测试')
+    parser.add_argument('-k', '--filter', default='', help='只运行名称包含该字符串的用例')
+    parser.add_argument('-d', '--duration', type=float, default=DEFAULT_DURATION,
+                        help='每个用例的测量时长（秒）')
+    parser.add_argument('--save', metavar='FILE', help='把结果保存为基线')
+    parser.add_argument('--compare', metavar='FILE', help='与基线比较')
+    parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='回归阈值，默认0.2表示慢20%%')
+    parser.add_argument('--startup', action='store_true', help='只测量冷/热启动到第一帧的耗时')
+    parser.add_argument('--runs', type=int, default=5, help='启动测量的次数')
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        print(f"{'游戏':<10}{'冷启动 ms':>10}{'热启动 ms':>10}")
+        for game in STARTUP_SCRIPTS:
+            cold, warm = startup(game, args.runs)
+            print(f"{game:<12}{cold:>12.1f}{warm:>12.1f}")
+        return 0
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    with scratch_files():
+        results = run(names, args.duration)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    # 中文字符占两列，表头的宽度相应减少
+    print(f"{'用例':<32}{'次/秒':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'对比基线':>6}")
+    for name, r in results.items():
+        change = ''
+        if name in baseline:
+            change = f"{r['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:+.1%}"
+        print(f"{name:<34}{r['ops_per_sec']:>14,.0f}{r['p50_ms']:>10.4f}"
+              f"{r['p90_ms']:>10.4f}{r['p99_ms']:>10.4f}{change:>10}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'pygame': pygame.version.ver,
+                    'platform': platform.platform(),
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                },
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new, change in regressions:
+        print(f"回归：{name} 从 {old:,.0f} 次/秒 降到 {new:,.0f} 次/秒（{change:+.1%}）",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import json
+import os
+
+import pygame
+
+# 字体查找：先检查候选文件路径，都不存在时再按字体名查找系统字体，后者的结果缓存在磁盘上
+# 按名称查找要扫描系统字体（Windows读注册表，Linux调用fc-list），冷启动时可能要几百毫秒；
+# 缓存的路径用文件的mtime校验，没找到的结果用各字体目录的mtime校验，安装或删除字体后自动重新查找
+# 设置环境变量GAME_FONT_CACHE可以改变缓存文件的位置
+
+CACHE_VERSION = 1
+CACHE_ENV = 'GAME_FONT_CACHE'
+DEFAULT_CACHE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'pygame-games', 'fonts.json')
+
+# 每类字体的候选：先试这些文件路径，再按字体名查找系统字体
+FONT_CANDIDATES = {
+    # 能显示中文的字体
+    'cjk': (
+        [
+            "simhei.ttf",  # 当前目录下的黑体
+            "C:/Windows/Fonts/msyh.ttc",    # Windows 系统微软雅黑
+            "C:/Windows/Fonts/simhei.ttf",  # Windows 系统黑体
+            "/System/Library/Fonts/PingFang.ttc",  # macOS 系统字体
+            "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+            "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+            "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf",  # Linux 系统字体
+        ],
+        ['microsoftyahei', 'simhei', 'pingfangsc', 'notosanscjksc', 'wenquanyimicrohei',
+         'droidsansfallback'],
+    ),
+    # 按键上的英文和箭头
+    'latin': (
+        [
+            "C:/Windows/Fonts/arial.ttf",
+            "/System/Library/Fonts/Supplemental/Arial.ttf",
+            "/Library/Fonts/Arial.ttf",
+            "/usr/share/fonts/truetype/msttcorefonts/Arial.ttf",
+        ],
+        ['arial'],
+    ),
+}
+
+# 没找到字体时用来判断是否有新字体安装的目录
+FONT_DIRS = [
+    "C:/Windows/Fonts",
+    "/System/Library/Fonts",
+    "/Library/Fonts",
+    os.path.expanduser("~/Library/Fonts"),
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+]
+
+_paths = {}  # 本进程中已经确定的路径
+_fonts = {}  # (类别, 字号) -> Font
+
+
+def cache_path():
+    return os.environ.get(CACHE_ENV) or DEFAULT_CACHE
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _dir_mtimes():
+    return {d: m for d, m in ((d, _mtime(d)) for d in FONT_DIRS) if m is not None}
+
+
+def _load_cache():
+    try:
+        with open(cache_path(), encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('fonts', {})
+
+
+def _save_cache(entries):
+    """原子地写入缓存，写不了时忽略（缓存只是加速）"""
+    path = cache_path()
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp = path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'fonts': entries}, f, ensure_ascii=False, indent=2)
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+def _valid(entry):
+    """缓存项仍然有效：找到的文件没变，或者没找到且字体目录都没变"""
+    if not isinstance(entry, dict):
+        return False
+    path = entry.get('path')
+    if path is not None:
+        return _mtime(path) == entry.get('mtime')
+    return entry.get('dirs') == _dir_mtimes()
+
+
+def find_font(kind='cjk'):
+    """返回该类字体的文件路径，找不到时返回None"""
+    if kind in _paths:
+        return _paths[kind]
+    paths, names = FONT_CANDIDATES[kind]
+    # 候选路径只需几次stat，每次都直接检查
+    path = next((path for path in paths if os.path.isfile(path)), None)
+    if path is None:
+        entries = _load_cache()
+        entry = entries.get(kind)
+        if not _valid(entry):
+            # 按名称查找会扫描系统字体，是冷启动中最慢的一步
+            path = pygame.font.match_font(names)
+            if path is not None:
+                entry = {'path': path, 'mtime': _mtime(path)}
+            else:
+                entry = {'path': None, 'dirs': _dir_mtimes()}
+            entries[kind] = entry
+            _save_cache(entries)
+        path = entry['path']
+    _paths[kind] = path
+    return path
+
+
+def load_font(size, kind='cjk'):
+    """按字号加载字体，同一字号只加载一次；找不到或加载失败时使用pygame默认字体"""
+    key = (kind, size)
+    font = _fonts.get(key)
+    if font is None:
+        pygame.font.init()
+        path = find_font(kind)
+        try:
+            font = pygame.font.Font(path, size)
+        except (OSError, pygame.error):
+            font = pygame.font.Font(None, size)
+        _fonts[key] = font
+    return font
@@ -0,0 +1,178 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# 本地存档：每局的得分、时长、消行数或蛇长、种子和时间保存在SQLite数据库（WAL模式）里
+# 写入只把记录放进队列，由后台线程攒一小批后在一个事务里提交，游戏循环不会等待磁盘
+# 排行榜查询走(游戏, 分数)索引，结果缓存在内存中，只有本进程写入新记录时才失效
+# 设置环境变量GAME_SCORE_DB可以改变数据库文件的位置
+
+SCORE_ENV = 'GAME_SCORE_DB'
+DEFAULT_DB = os.path.join(
+    os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share'),
+    'pygame-games', 'scores.db')
+
+# 后台线程收到一条记录后再等待这么久（秒），把这段时间内的记录合并到一个事务
+BATCH_INTERVAL = 0.5
+# 排行榜默认的条数
+TOP_SIZE = 5
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    lines INTEGER,
+    length INTEGER,
+    seed INTEGER,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_top ON records (game, score DESC, created);
+'''
+
+FIELDS = 'game, score, duration, lines, length, seed, created'
+
+# 一局的记录：lines是俄罗斯方块的消行数，length是贪吃蛇的蛇长，不适用的为None
+Record = namedtuple('Record', FIELDS)
+
+
+def db_path():
+    return os.environ.get(SCORE_ENV) or DEFAULT_DB
+
+
+def connect(path):
+    """打开数据库并切换到WAL模式，读连接和写连接互不阻塞"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL模式下NORMAL只在检查点时同步，断电最多丢失最近的事务，不会损坏数据库
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class ScoreStore:
+    """每局记录的存档：add()只入队，后台线程批量写入；top()返回缓存的排行榜"""
+
+    def __init__(self, path=None, batch_interval=BATCH_INTERVAL):
+        self.path = path or db_path()
+        self.batch_interval = batch_interval
+        self.queue = queue.Queue()
+        self.writer = None
+        self.reader = None
+        self.closed = False
+        # 已入队但还没提交的记录，查询时与数据库的结果合并，刚结束的一局立即出现在排行榜上
+        self.unsaved = []
+        # (游戏, 条数) -> 排行榜；同一份结果返回同一个列表对象，调用方可以用is判断是否变化
+        self.cache = {}
+        self.generation = 0  # 每次add()加一，查询期间有新记录时结果不进缓存
+        self.lock = threading.Lock()
+
+    def add(self, game, score, duration, lines=None, length=None, seed=None):
+        """记录一局，不等待写入，返回记录"""
+        record = Record(game, score, duration, lines, length, seed, time.time())
+        with self.lock:
+            self.unsaved.append(record)
+            self.generation += 1
+            for key in [key for key in self.cache if key[0] == game]:
+                del self.cache[key]
+        # 后台线程在第一次写入时才启动，只查询不写入的进程不创建线程
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, name='ScoreStore', daemon=True)
+            self.writer.start()
+            atexit.register(self.close)
+        self.queue.put(record)
+        return record
+
+    def top(self, game, limit=TOP_SIZE):
+        """按分数从高到低返回该游戏的前limit条记录，分数相同时早的在前"""
+        key = (game, limit)
+        with self.lock:
+            records = self.cache.get(key)
+            if records is not None:
+                return records
+            # 先取未提交的记录再查询：记录只在提交之后才移出unsaved，两边合起来不会漏
+            unsaved = [record for record in self.unsaved if record.game == game]
+            generation = self.generation
+        rows = self._query(game, limit)
+        # 查询期间刚提交的记录两边都有，按内容去重
+        seen = set(rows)
+        records = sorted(rows + [record for record in unsaved if record not in seen],
+                         key=lambda record: (-record.score, record.created))[:limit]
+        with self.lock:
+            if self.generation == generation:
+                self.cache[key] = records
+        return records
+
+    def best(self, game):
+        """该游戏的最高分，没有记录时为0"""
+        records = self.top(game, 1)
+        return records[0].score if records else 0
+
+    def _query(self, game, limit):
+        try:
+            if self.reader is None:
+                self.reader = connect(self.path)
+            rows = self.reader.execute(
+                f'SELECT {FIELDS} FROM records WHERE game = ? '
+                'ORDER BY score DESC, created LIMIT ?', (game, limit)).fetchall()
+        except (OSError, sqlite3.Error) as e:
+            print("存档读取失败:", e)
+            return []
+        return [Record(*row) for row in rows]
+
+    def _write_loop(self):
+        try:
+            conn = connect(self.path)
+        except (OSError, sqlite3.Error) as e:
+            # 写不了时记录只保留在内存中，本次运行的排行榜照常显示
+            print("存档打开失败:", e)
+            return
+        running = True
+        while running:
+            record = self.queue.get()
+            if record is None:
+                break
+            batch = [record]
+            # 攒一小批再提交，连续结束的几局只写一次磁盘
+            deadline = time.monotonic() + self.batch_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
+            try:
+                with conn:
+                    conn.executemany(
+                        f'INSERT INTO records ({FIELDS}) VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+            except sqlite3.Error as e:
+                print("存档保存失败:", e)
+                continue
+            with self.lock:
+                for record in batch:
+                    self.unsaved.remove(record)
+        conn.close()
+
+    def close(self):
+        """写完队列中的记录并停止后台线程，可以重复调用"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
@@ -0,0 +1,167 @@
+import json
+import time
+
+import pygame
+
+# 逐帧性能分析：按阶段记录耗时到固定大小的环形缓冲区，可以在游戏中显示统计叠加层，
+# 也可以导出Chrome trace格式（chrome://tracing或Perfetto打开）离线分析卡顿
+# 用法：每帧开头调用begin_frame()，每个阶段结束时调用mark(阶段名)，阶段首尾相接
+# 关闭时begin_frame和mark只检查一个标志，几乎没有开销
+
+# 环形缓冲区能保存的阶段记录数
+EVENT_CAPACITY = 8192
+# 保存的帧时长数量，统计帧率和分位数使用
+FRAME_CAPACITY = 600
+# 叠加层的刷新间隔（秒），避免每帧都渲染文字
+OVERLAY_INTERVAL = 0.25
+# 叠加层列出的最耗时阶段数
+TOP_PHASES = 5
+# 等待帧率限制或空闲时等待输入的阶段，不计入耗时排名
+IDLE_PHASES = ('clock.tick', 'idle.wait')
+
+
+class Profiler:
+    """记录每帧各阶段的耗时"""
+
+    def __init__(self, event_capacity=EVENT_CAPACITY, frame_capacity=FRAME_CAPACITY):
+        self.enabled = False
+        # 阶段记录：名称、开始时间和耗时（秒）存放在预先分配的列表里，写满后覆盖最旧的
+        self.names = [None] * event_capacity
+        self.starts = [0.0] * event_capacity
+        self.durations = [0.0] * event_capacity
+        self.event_head = 0
+        self.event_count = 0
+        # 每帧的总时长
+        self.frame_times = [0.0] * frame_capacity
+        self.frame_head = 0
+        self.frame_count = 0
+        self.frame_start = None
+        self.last = 0.0
+        # 叠加层缓存
+        self.font = None
+        self.overlay = None
+        self.overlay_time = 0.0
+
+    def toggle(self):
+        """打开或关闭记录，重新打开时从空的缓冲区开始"""
+        self.enabled = not self.enabled
+        self.event_head = self.event_count = 0
+        self.frame_head = self.frame_count = 0
+        self.frame_start = None
+        self.overlay = None
+
+    def begin_frame(self):
+        """标记新的一帧开始，同时结束上一帧"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self._record('frame', self.frame_start, now - self.frame_start)
+            self.frame_times[self.frame_head] = now - self.frame_start
+            self.frame_head = (self.frame_head + 1) % len(self.frame_times)
+            self.frame_count = min(self.frame_count + 1, len(self.frame_times))
+        self.frame_start = now
+        self.last = now
+
+    def mark(self, name):
+        """结束从上一个标记（或帧开始）到现在的阶段"""
+        if not self.enabled or self.frame_start is None:
+            return
+        now = time.perf_counter()
+        self._record(name, self.last, now - self.last)
+        self.last = now
+
+    def _record(self, name, start, duration):
+        head = self.event_head
+        self.names[head] = name
+        self.starts[head] = start
+        self.durations[head] = duration
+        self.event_head = (head + 1) % len(self.names)
+        self.event_count = min(self.event_count + 1, len(self.names))
+
+    def events(self):
+        """按时间顺序返回缓冲区中的记录[(名称, 开始, 耗时), ...]"""
+        capacity = len(self.names)
+        first = (self.event_head - self.event_count) % capacity
+        return [
+            (self.names[i % capacity], self.starts[i % capacity], self.durations[i % capacity])
+            for i in range(first, first + self.event_count)
+        ]
+
+    def frame_stats(self):
+        """返回(帧率, 帧时长p50毫秒, 帧时长p99毫秒)，没有数据时返回None"""
+        if not self.frame_count:
+            return None
+        if self.frame_count < len(self.frame_times):
+            times = self.frame_times[:self.frame_count]
+        else:
+            times = self.frame_times[:]
+        fps = len(times) / sum(times)
+        times.sort()
+        p50 = times[len(times) // 2]
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        return fps, p50 * 1000, p99 * 1000
+
+    def phase_stats(self):
+        """按每帧平均耗时从高到低返回各阶段[(名称, 平均毫秒), ...]，不含帧本身和等待"""
+        totals = {}
+        frames = 0
+        for name, _, duration in self.events():
+            if name == 'frame':
+                frames += 1
+            elif name not in IDLE_PHASES:
+                totals[name] = totals.get(name, 0.0) + duration
+        frames = max(frames, 1)
+        return sorted(((name, total * 1000 / frames) for name, total in totals.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def draw_overlay(self, surface, pos=(10, 10)):
+        """在surface上绘制统计叠加层，返回绘制的矩形；文字每OVERLAY_INTERVAL秒才重新渲染"""
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time >= OVERLAY_INTERVAL:
+            self.overlay = self.render_overlay()
+            self.overlay_time = now
+        return surface.blit(self.overlay, pos)
+
+    def render_overlay(self):
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, 20)
+        stats = self.frame_stats()
+        if stats is None:
+            lines = ['profiling...']
+        else:
+            fps, p50, p99 = stats
+            lines = ['FPS %.1f' % fps, 'frame p50 %.2f ms  p99 %.2f ms' % (p50, p99)]
+            lines += ['%-16s %6.3f ms' % item for item in self.phase_stats()[:TOP_PHASES]]
+        texts = [self.font.render(line, True, (230, 230, 230)) for line in lines]
+        line_height = self.font.get_linesize()
+        width = max(text.get_width() for text in texts) + 12
+        overlay = pygame.Surface((width, line_height * len(texts) + 8))
+        # 不透明背景，重复绘制时完全覆盖上一次的内容
+        overlay.fill((20, 20, 24))
+        for i, text in enumerate(texts):
+            overlay.blit(text, (6, 4 + i * line_height))
+        return overlay
+
+    def dump_trace(self, path=None):
+        """把缓冲区导出为Chrome trace JSON，返回文件路径"""
+        if path is None:
+            path = time.strftime('trace-%Y%m%d-%H%M%S.json')
+        events = self.events()
+        origin = events[0][1] if events else 0.0
+        trace = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': (start - origin) * 1e6,
+                'dur': duration * 1e6,
+                'pid': 0,
+                # 帧和阶段放在两行，便于对照
+                'tid': 0 if name == 'frame' else 1,
+            }
+            for name, start, duration in events
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+        return path
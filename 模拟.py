@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from 俄罗斯方块AI import TetrisBot
+from 俄罗斯方块引擎 import ACTION_DROP, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_TICK, TetrisEngine
+from 贪吃蛇AI import Autopilot
+from 贪吃蛇引擎 import DIRECTIONS, SnakeEngine
+
+# 多进程批量模拟：按种子在进程池中完整地跑很多局游戏，逐局写出统计结果并汇总
+# 用法：python 模拟.py tetris -n 1000 -j 8 -o tetris.jsonl
+# 输出文件是每行一局的JSON，中断后用相同参数重新运行会跳过已完成的种子
+
+# 每个任务包含的局数，减少进程间通信的开销
+CHUNK_SIZE = 8
+
+# 需要汇总的统计项
+SUMMARY_FIELDS = ('score', 'steps', 'pieces', 'lines', 'length', 'duration')
+
+
+def play_tetris(seed, max_pieces=10000):
+    """用给定种子完整地玩一局俄罗斯方块，返回统计数据"""
+    start = time.perf_counter()
+    engine = TetrisEngine(seed=seed, bitboard=True)
+    policy = random.Random(seed)
+    steps = 0
+    while not engine.game_over and engine.pieces < max_pieces:
+        # 随机选择旋转次数和横向位置，然后落到底并锁定
+        actions = [ACTION_ROTATE] * policy.randint(0, 3)
+        shift = policy.randint(-engine.width // 2, engine.width // 2)
+        actions += [ACTION_RIGHT if shift > 0 else ACTION_LEFT] * abs(shift)
+        actions += [ACTION_DROP, ACTION_TICK]
+        engine.step_many(actions)
+        steps += len(actions)
+    return {
+        'game': 'tetris',
+        'seed': seed,
+        'score': engine.score,
+        'steps': steps,
+        'pieces': engine.pieces,
+        'lines': engine.lines,
+        'duration': time.perf_counter() - start,
+    }
+
+
+def play_tetris_bot(seed, max_pieces=10000):
+    """用内置机器人玩一局俄罗斯方块，返回统计数据"""
+    start = time.perf_counter()
+    engine = TetrisEngine(seed=seed, bitboard=True)
+    # 批量模拟不做前瞻，每个方块的搜索量少一个数量级
+    bot = TetrisBot(lookahead=False)
+    steps = 0
+    while not engine.game_over and engine.pieces < max_pieces:
+        actions = bot.actions(engine) + [ACTION_TICK]
+        engine.step_many(actions)
+        steps += len(actions)
+    return {
+        'game': 'tetris-bot',
+        'seed': seed,
+        'score': engine.score,
+        'steps': steps,
+        'pieces': engine.pieces,
+        'lines': engine.lines,
+        'duration': time.perf_counter() - start,
+    }
+
+
+def greedy_direction(engine, policy):
+    """朝食物方向走，避开下一步就会撞上的格子"""
+    snake = engine.snake
+    head_x, head_y = snake.positions[0]
+    food_x, food_y = engine.food
+    tail = snake.positions[-1]
+    tail_moves = len(snake.positions) >= snake.length
+    best = None
+    best_distance = None
+    for direction in policy.sample(DIRECTIONS, len(DIRECTIONS)):
+        if snake.length > 1 and (-direction[0], -direction[1]) == snake.direction:
+            continue
+        x = head_x + direction[0]
+        y = head_y + direction[1]
+        if not (0 <= x < engine.width and 0 <= y < engine.height):
+            continue
+        if (x, y) in snake.occupied and not (tail_moves and (x, y) == tail):
+            continue
+        distance = abs(x - food_x) + abs(y - food_y)
+        if best is None or distance < best_distance:
+            best = direction
+            best_distance = distance
+    return best
+
+
+def play_snake(seed, max_steps=1000000):
+    """用给定种子完整地玩一局贪吃蛇，返回统计数据"""
+    start = time.perf_counter()
+    engine = SnakeEngine(seed=seed)
+    policy = random.Random(seed)
+    # 太久没有吃到食物时认为陷入循环，结束本局
+    patience = engine.width * engine.height * 2
+    idle = 0
+    while not engine.game_over and engine.steps < max_steps and idle < patience:
+        reward = engine.step(greedy_direction(engine, policy))
+        idle = 0 if reward > 0 else idle + 1
+    return {
+        'game': 'snake',
+        'seed': seed,
+        'score': engine.score,
+        'steps': engine.steps,
+        'length': engine.snake.length,
+        'won': engine.won,
+        'duration': time.perf_counter() - start,
+    }
+
+
+def play_snake_autopilot(seed, max_steps=1000000):
+    """用自动驾驶玩一局贪吃蛇，返回统计数据"""
+    start = time.perf_counter()
+    engine = SnakeEngine(seed=seed)
+    autopilot = Autopilot(engine.width, engine.height)
+    while not engine.game_over and engine.steps < max_steps:
+        engine.step(autopilot.next_direction(engine.snake, engine.food))
+    return {
+        'game': 'snake-autopilot',
+        'seed': seed,
+        'score': engine.score,
+        'steps': engine.steps,
+        'length': engine.snake.length,
+        'won': engine.won,
+        'duration': time.perf_counter() - start,
+    }
+
+
+GAMES = {
+    'tetris': play_tetris,
+    'tetris-bot': play_tetris_bot,
+    'snake': play_snake,
+    'snake-autopilot': play_snake_autopilot,
+}
+
+
+def play_chunk(game, seeds):
+    """在子进程中连续玩一组种子"""
+    play = GAMES[game]
+    return [play(seed) for seed in seeds]
+
+
+def load_finished(path):
+    """读取已有结果文件中完成的局，用于断点续跑；按(游戏, 种子)索引，同一文件里的其他游戏不会被当成已完成"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 中断时可能写了半行
+            results[record['game'], record['seed']] = record
+    return results
+
+
+def summarize(records):
+    """计算各统计项的平均值、标准差、最小值、中位数和最大值"""
+    summary = {'games': len(records)}
+    for field in SUMMARY_FIELDS:
+        values = [r[field] for r in records if field in r]
+        if not values:
+            continue
+        summary[field] = {
+            'mean': statistics.fmean(values),
+            'stdev': statistics.pstdev(values),
+            'min': min(values),
+            'median': statistics.median(values),
+            'max': max(values),
+        }
+    return summary
+
+
+def simulate(game, games, seed=0, workers=None, output=None, progress=None):
+    """把seed开始的games局游戏分给进程池，结果逐局写入output，返回汇总统计"""
+    finished = load_finished(output) if output else {}
+    pending = [s for s in range(seed, seed + games) if (game, s) not in finished]
+    records = [finished[game, s] for s in range(seed, seed + games) if (game, s) in finished]
+    chunks = [pending[i:i + CHUNK_SIZE] for i in range(0, len(pending), CHUNK_SIZE)]
+
+    workers = workers or os.cpu_count() or 1
+    # 限制同时在途的任务数，避免一次性提交大量任务占用内存
+    max_in_flight = workers * 4
+    chunks = iter(chunks)
+    in_flight = set()
+
+    out = open(output, 'a', encoding='utf-8') if output else None
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            for chunk in chunks:
+                in_flight.add(pool.submit(play_chunk, game, chunk))
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                for record in future.result():
+                    records.append(record)
+                    if out:
+                        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                if out:
+                    out.flush()
+                if progress:
+                    progress(len(records), games)
+    finally:
+        # 中断时丢弃还没开始的任务，已写出的结果下次会被跳过
+        pool.shutdown(cancel_futures=True)
+        if out:
+            out.close()
+    return summarize(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='多进程批量模拟俄罗斯方块和贪吃蛇')
+    parser.add_argument('game', choices=sorted(GAMES))
+    parser.add_argument('-n', '--games', type=int, default=100, help='模拟的局数')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='第一局的随机种子')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='进程数，默认等于CPU核数')
+    parser.add_argument('-o', '--output', default=None, help='逐局结果的JSONL文件，支持断点续跑')
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f'\r已完成 {done}/{total}', end='', file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    summary = simulate(args.game, args.games, args.seed, args.workers, args.output, progress)
+    print(file=sys.stderr)
+    summary['wall_time'] = time.perf_counter() - start
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
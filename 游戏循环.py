@@ -0,0 +1,41 @@
+# 两个游戏共用的主循环工具，不依赖pygame
+
+# 渲染和输入轮询的目标帧率
+RENDER_FPS = 60
+
+# 暂停或结束画面等待输入的超时（毫秒）：画面画好后阻塞等待事件，超时也只刷新一帧
+IDLE_TIMEOUT = 1000
+
+
+class FixedTimestep:
+    """累加器式固定步长调度：逻辑按固定间隔推进，与渲染帧率无关"""
+
+    def __init__(self, step_ms, max_steps=5):
+        self.step_ms = step_ms      # 每个逻辑步的时长（毫秒）
+        self.max_steps = max_steps  # 单帧最多追赶的逻辑步数
+        self.accumulator = 0.0
+
+    def set_rate(self, hz):
+        """按每秒逻辑步数设置步长"""
+        self.step_ms = 1000.0 / hz
+
+    def advance(self, delta_ms):
+        """累加本帧经过的时间，返回本帧应执行的逻辑步数"""
+        self.accumulator += delta_ms
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            # 卡顿太久时不再追赶，丢弃多余的时间，避免画面冻结后突然快进
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step_ms
+        else:
+            self.accumulator -= steps * self.step_ms
+        return steps
+
+    @property
+    def alpha(self):
+        """距离下一个逻辑步的进度（0~1），可用于插值绘制"""
+        return self.accumulator / self.step_ms
+
+    def reset(self):
+        """暂停或重新开始后清空累积时间"""
+        self.accumulator = 0.0
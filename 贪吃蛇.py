@@ -1,20 +1,26 @@
+import argparse
 import pygame
 import sys
 import random
 import math
 import time
+from collections import OrderedDict, deque
+from itertools import islice, repeat
 
-# 初始化Pygame
-pygame.init()
-
-# 使用系统默认中文字体
 try:
-    font_path = pygame.font.match_font('simhei')  # 优先使用黑体
-    if font_path is None:
-        font_path = pygame.font.match_font('microsoftyaheimicrosoftyaheiui')  # 尝试使用雅黑
-    GAME_FONT = pygame.font.Font(font_path, 36)
-except:
-    GAME_FONT = pygame.font.Font(None, 36)  # 如果没有找到中文字体，使用默认字体
+    import numpy as np
+except ImportError:  # 没有numpy时渐变逐行绘制
+    np = None
+
+from 性能分析 import Profiler
+from 游戏循环 import IDLE_TIMEOUT, RENDER_FPS, FixedTimestep
+from 贪吃蛇AI import Autopilot
+from 贪吃蛇引擎 import UP, DOWN, LEFT, RIGHT, DIRECTIONS, SnakeBody
+from 回放 import GAME_NAMES, GAME_SNAKE, ReplayRecorder, save_replay
+from 存档 import ScoreStore
+from 字体 import find_font, load_font
+
+# pygame不在导入时初始化，Game只启动用到的显示模块，字体模块由load_font按需初始化
 
 # 设置游戏窗口
 WINDOW_WIDTH = 800
@@ -34,11 +40,8 @@ DARK_GRAY = (44, 44, 46)
 BORDER_COLOR = (60, 60, 60)  # 边框颜色
 BG_COLOR = (28, 28, 30)      # 背景色
 
-# 方向定义
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
+# 渐变方向
+GRADIENT_MODES = ('vertical', 'horizontal', 'radial')
 
 # 在颜色定义后添加按键图标
 KEY_ICONS = {
@@ -56,6 +59,10 @@ MARGIN = 20  # 游戏区域边距
 PLAYABLE_WIDTH = (WINDOW_WIDTH - (MARGIN * 2)) // GRID_SIZE
 PLAYABLE_HEIGHT = (WINDOW_HEIGHT - (MARGIN * 2)) // GRID_SIZE
 
+# 格子小于这个尺寸时不再逐节贴图，改用PixelBoard整体缩放绘制
+SPRITE_MIN_CELL = 10
+PIXEL_BG = (35, 35, 40)  # 像素画布的空地颜色
+
 # 更新颜色定义，使用更优雅的配色方案
 PANEL_BG = (22, 22, 25)      # 深色背景
 PANEL_LIGHT = (32, 32, 35)   # 面板色
@@ -66,111 +73,74 @@ TEXT_SECONDARY = (160, 160, 165)  # 次要文本色
 BUTTON_BG = (40, 40, 45)     # 按键背景色
 BUTTON_ACTIVE = (50, 50, 55)  # 按键激活色
 
-class Snake:
-    def __init__(self):
-        self.size = 20
-        self.game_padding = 20
+class Snake(SnakeBody):
+    """窗口中的蛇：移动逻辑在网格坐标的SnakeBody中，这里负责颜色和像素坐标"""
+
+    def __init__(self, width=PLAYABLE_WIDTH, height=PLAYABLE_HEIGHT, size=GRID_SIZE,
+                 origin=(MARGIN, MARGIN)):
+        self.size = size
+        self.origin = origin  # 棋盘左上角的像素坐标
         # 更新颜色设置
         self.head_color = (60, 220, 60)    # 鲜艳的绿色头部
         self.body_color = (50, 180, 50)    # 稍暗的绿色身体
         self.edge_light = (120, 255, 120)  # 明亮的边缘高光
         self.edge_dark = (40, 160, 40)     # 深色边缘
-        self.reset()
+        super().__init__(width, height)
 
-    def reset(self):
-        """重置蛇的位置到网格中心"""
-        # 计算起始网格位置
-        grid_x = (WINDOW_WIDTH - 2 * self.game_padding) // (2 * self.size)
-        grid_y = (WINDOW_HEIGHT - 2 * self.game_padding) // (2 * self.size)
-        
-        # 计算实际像素位置（确保对齐网格）
-        start_x = self.game_padding + grid_x * self.size
-        start_y = self.game_padding + grid_y * self.size
-        
-        self.positions = [(start_x, start_y)]
-        self.direction = (1, 0)
-        self.score = 0
-        self.length = 1
-
-    def update(self):
-        """更新蛇的位置，修复边界判定"""
-        head_x, head_y = self.positions[0]
-        dir_x, dir_y = self.direction
-        
-        # 计算新位置
-        new_x = head_x + dir_x * self.size
-        new_y = head_y + dir_y * self.size
-        
-        # 检查是否真正撞墙（严格判定）
-        if (new_x <= self.game_padding - self.size or 
-            new_x >= WINDOW_WIDTH - self.game_padding or
-            new_y <= self.game_padding - self.size or 
-            new_y >= WINDOW_HEIGHT - self.game_padding):
-            return False
-        
-        # 检查是否撞到自己
-        if (new_x, new_y) in self.positions[:-1]:
-            return False
-            
-        # 更新位置
-        self.positions.insert(0, (new_x, new_y))
-        if len(self.positions) > self.length:
-            self.positions.pop()
-        return True
+    def to_pixel(self, cell):
+        """网格坐标转换为格子左上角的像素坐标"""
+        return (self.origin[0] + cell[0] * self.size,
+                self.origin[1] + cell[1] * self.size)
 
-    def get_head_position(self):
-        return self.positions[0]
-
-    def turn(self, direction):
-        if self.length > 1:
-            if (direction[0] * -1, direction[1] * -1) == self.direction:
-                return
-        self.direction = direction
-
-    def render(self, screen):
-        """绘制蛇，使用更明显的渐变效果"""
-        for i, pos in enumerate(self.positions):
-            if i == 0:  # 蛇头
-                base_color = self.head_color
-                edge_light = self.edge_light
-                edge_dark = self.edge_dark
-            else:  # 蛇身渐变
-                # 计算渐变比例，但保持颜色明亮
-                fade = min(0.5, i * 0.05)  # 限制最大渐变程度
-                # 向黄色渐变而不是变暗
-                base_color = (
-                    min(255, self.body_color[0] + int(100 * fade)),  # 红色增加
-                    max(100, self.body_color[1] - int(30 * fade)),   # 绿色稍微降低
-                    min(255, self.body_color[2] + int(80 * fade))    # 蓝色增加
-                )
-                edge_light = (
-                    min(255, self.edge_light[0] + int(100 * fade)),
-                    max(120, self.edge_light[1] - int(30 * fade)),
-                    min(255, self.edge_light[2] + int(80 * fade))
-                )
-                edge_dark = (
-                    min(255, self.edge_dark[0] + int(100 * fade)),
-                    max(40, self.edge_dark[1] - int(30 * fade)),
-                    min(255, self.edge_dark[2] + int(80 * fade))
-                )
-            
-            # 绘制主体
-            pygame.draw.rect(screen, base_color,
-                           (pos[0], pos[1], self.size, self.size))
-            
-            # 绘制高光
-            pygame.draw.rect(screen, edge_light,
-                           (pos[0], pos[1], self.size, self.size//3))
-            
-            # 绘制边框
-            pygame.draw.rect(screen, edge_dark,
-                           (pos[0], pos[1], self.size, self.size), 1)
+    def segment_colors(self, i):
+        """第i节的主体、高光和边框颜色，使用更明显的渐变效果"""
+        if i == 0:  # 蛇头
+            return self.head_color, self.edge_light, self.edge_dark
+        
+        # 蛇身渐变
+        # 计算渐变比例，但保持颜色明亮
+        fade = min(0.5, i * 0.05)  # 限制最大渐变程度
+        # 向黄色渐变而不是变暗
+        base_color = (
+            min(255, self.body_color[0] + int(100 * fade)),  # 红色增加
+            max(100, self.body_color[1] - int(30 * fade)),   # 绿色稍微降低
+            min(255, self.body_color[2] + int(80 * fade))    # 蓝色增加
+        )
+        edge_light = (
+            min(255, self.edge_light[0] + int(100 * fade)),
+            max(120, self.edge_light[1] - int(30 * fade)),
+            min(255, self.edge_light[2] + int(80 * fade))
+        )
+        edge_dark = (
+            min(255, self.edge_dark[0] + int(100 * fade)),
+            max(40, self.edge_dark[1] - int(30 * fade)),
+            min(255, self.edge_dark[2] + int(80 * fade))
+        )
+        return base_color, edge_light, edge_dark
+
+    def blit_list(self, sprites):
+        """生成蛇身每一节的(贴图, 位置)序列，供Surface.blits批量绘制"""
+        segments = sprites.segments
+        pixels = list(map(self.to_pixel, self.positions))
+        blits = list(zip(segments, pixels))
+        if len(pixels) > len(segments):
+            # 渐变饱和之后的身体都使用同一张贴图
+            blits.extend(zip(repeat(segments[-1]),
+                             islice(pixels, len(segments), None)))
+        return blits
+
+    def render(self, screen, sprites):
+        """使用预先渲染的贴图绘制蛇"""
+        screen.blits(self.blit_list(sprites), doreturn=False)
 
 class Food:
-    def __init__(self):
-        self.size = 20 # 网格大小
-        self.game_padding = 20
-        self.radius = 8
+    def __init__(self, width=PLAYABLE_WIDTH, height=PLAYABLE_HEIGHT, size=GRID_SIZE,
+                 origin=(MARGIN, MARGIN)):
+        self.width = width
+        self.height = height
+        self.size = size # 网格大小
+        self.origin = origin
+        self.radius = size * 2 // 5
         # 添加所有需要的颜色属性
         self.main_color = (220, 40, 40)      # 主体颜色
         self.highlight_color = (255, 180, 180)  # 高光颜色
@@ -178,19 +148,21 @@ class Food:
         self.glow_color = (255, 100, 100)      # 边缘光晕颜色
         self.reset()
 
-    def reset(self):
-        """重置食物位置到网格中心"""
-        grid_width = (WINDOW_WIDTH - 2 * self.game_padding) // self.size
-        grid_height = (WINDOW_HEIGHT - 2 * self.game_padding) // self.size
-        
-        # 随机选择网格位置
-        grid_x = random.randint(0, grid_width - 1)
-        grid_y = random.randint(0, grid_height - 1)
+    def reset(self, free_cells=None, rng=random):
+        """用rng随机放置食物，给出空闲格子时只在空格中选择，没有空格返回False"""
+        if free_cells is not None:
+            self.cell = free_cells.sample(rng)
+            if self.cell is None:
+                return False
+        else:
+            # 随机选择网格位置
+            self.cell = (rng.randint(0, self.width - 1),
+                         rng.randint(0, self.height - 1))
         
         # 计算网格左上角坐标
         self.grid_pos = (
-            self.game_padding + grid_x * self.size,
-            self.game_padding + grid_y * self.size
+            self.origin[0] + self.cell[0] * self.size,
+            self.origin[1] + self.cell[1] * self.size
         )
         
         # 计算食物中心点坐标（网格中心）
@@ -198,28 +170,132 @@ class Food:
             self.grid_pos[0] + self.size // 2,
             self.grid_pos[1] + self.size // 2
         )
+        return True
 
-    def render(self, screen):
-        """绘制食物，使用预定义的颜色"""
-        x, y = self.position
+    def sprite(self):
+        """绘制食物贴图（含阴影），使用预定义的颜色"""
+        shadow_offset = 2
+        size = self.radius * 2 + shadow_offset
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        x = y = self.radius
         
         # 阴影
-        shadow_offset = 2
-        s = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(s, self.shadow_color, (self.radius, self.radius), self.radius)
-        screen.blit(s, (x - self.radius + shadow_offset, y - self.radius + shadow_offset))
+        shadow = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(shadow, self.shadow_color, (self.radius, self.radius), self.radius)
+        surface.blit(shadow, (shadow_offset, shadow_offset))
         
         # 主体
-        pygame.draw.circle(screen, self.main_color, (x, y), self.radius)
+        pygame.draw.circle(surface, self.main_color, (x, y), self.radius)
         
         # 高光
         highlight_radius = self.radius // 2
-        pygame.draw.circle(screen, self.highlight_color,
+        pygame.draw.circle(surface, self.highlight_color,
                          (x - highlight_radius//2, y - highlight_radius//2),
                          highlight_radius)
         
         # 边缘光晕
-        pygame.draw.circle(screen, self.glow_color, (x, y), self.radius, 1)
+        pygame.draw.circle(surface, self.glow_color, (x, y), self.radius, 1)
+        return surface.convert_alpha()
+
+    def blit_item(self, sprites):
+        """食物的(贴图, 位置)"""
+        return sprites.food, (self.position[0] - self.radius, self.position[1] - self.radius)
+
+    def render(self, screen, sprites):
+        """使用预先渲染的贴图绘制食物"""
+        screen.blit(*self.blit_item(sprites))
+
+class SpriteAtlas:
+    """启动时预先渲染的蛇头、各级渐变蛇身和食物贴图"""
+
+    # fade在第10节之后不再变化
+    FADE_STEPS = 10
+
+    def __init__(self, snake, food):
+        self.segments = [self.render_segment(snake.size, *snake.segment_colors(i))
+                         for i in range(self.FADE_STEPS + 1)]
+        self.food = food.sprite()
+
+    @staticmethod
+    def render_segment(size, base_color, edge_light, edge_dark):
+        surface = pygame.Surface((size, size))
+        
+        # 绘制主体
+        surface.fill(base_color)
+        
+        # 绘制高光
+        pygame.draw.rect(surface, edge_light, (0, 0, size, size//3))
+        
+        # 绘制边框
+        pygame.draw.rect(surface, edge_dark, (0, 0, size, size), 1)
+        return surface.convert()
+
+class PixelBoard:
+    """大棋盘的像素画布：每factor×factor个格子对应画布上的一个像素
+
+    画布随蛇头前进和蛇尾让出格子逐像素更新，每个tick只改动几个像素；
+    每帧把画布按整数倍放大到显示区域后一次blit，绘制耗时与棋盘面积无关。
+    """
+
+    def __init__(self, width, height, area):
+        # 棋盘比显示区域还大时，多个格子合并成一个像素
+        self.factor = max(1, -(-width // area.width), -(-height // area.height))
+        self.canvas_width = -(-width // self.factor)
+        self.canvas_height = -(-height // self.factor)
+        self.canvas = pygame.Surface((self.canvas_width, self.canvas_height)).convert()
+        # 每个像素中被蛇身占据的格子数，降到0时恢复空地颜色
+        self.counts = [0] * (self.canvas_width * self.canvas_height)
+        self.scale = max(1, min(area.width // self.canvas_width,
+                                area.height // self.canvas_height))
+        self.rect = pygame.Rect(0, 0, self.canvas_width * self.scale,
+                                self.canvas_height * self.scale)
+        self.rect.center = area.center
+        self.scaled = pygame.Surface(self.rect.size).convert()
+        self.food_size = max(self.scale, 3)  # 食物至少画成3像素，避免看不见
+
+    def rebuild(self, snake):
+        """按蛇的当前位置重画整个画布，开局或直接修改了蛇身之后调用"""
+        self.canvas.fill(PIXEL_BG)
+        self.counts = [0] * len(self.counts)
+        for cell in snake.positions:
+            self.add(cell, snake.body_color)
+        self.canvas.set_at(self.pixel(snake.positions[0]), snake.head_color)
+
+    def pixel(self, cell):
+        return cell[0] // self.factor, cell[1] // self.factor
+
+    def add(self, cell, color):
+        x, y = self.pixel(cell)
+        self.counts[y * self.canvas_width + x] += 1
+        self.canvas.set_at((x, y), color)
+
+    def remove(self, cell):
+        x, y = self.pixel(cell)
+        i = y * self.canvas_width + x
+        self.counts[i] -= 1
+        if not self.counts[i]:
+            self.canvas.set_at((x, y), PIXEL_BG)
+
+    def step(self, snake, old_head, old_tail):
+        """蛇前进一步之后调用：擦掉让出的蛇尾，旧蛇头改为身体颜色，画上新蛇头"""
+        if snake.positions[-1] != old_tail:
+            self.remove(old_tail)
+        x, y = self.pixel(old_head)
+        if self.counts[y * self.canvas_width + x]:
+            self.canvas.set_at((x, y), snake.body_color)
+        self.add(snake.positions[0], snake.head_color)
+
+    def render(self, screen, food):
+        """放大画布并绘制到屏幕，食物画成一个小方块"""
+        pygame.transform.scale(self.canvas, self.rect.size, self.scaled)
+        screen.blit(self.scaled, self.rect)
+        if food.cell is None:
+            return  # 蛇占满棋盘，没有食物
+        x, y = self.pixel(food.cell)
+        food_rect = pygame.Rect(0, 0, self.food_size, self.food_size)
+        food_rect.center = (self.rect.x + x * self.scale + self.scale // 2,
+                            self.rect.y + y * self.scale + self.scale // 2)
+        screen.fill(food.main_color, food_rect)
 
 def draw_rounded_rect(surface, color, rect, radius=15, border=0):
     """绘制圆角矩形"""
@@ -240,43 +316,160 @@ def draw_rounded_rect(surface, color, rect, radius=15, border=0):
     if border > 0:
         pygame.draw.rect(surface, BORDER_COLOR, rect, border, border_radius=radius)
 
-# 在游戏开始时初始化字体
-def get_chinese_font():
-    """获取系统中可用的中文字体"""
-    chinese_fonts = [
-        'microsoftyahei', 
-        'simsun', 
-        'simhei', 
-        'microsoft yahei',
-        'dengxian',
-        'fangsong',
-        'kaiti'
-    ]
-    
-    available_font = None
-    for font_name in chinese_fonts:
-        try:
-            available_font = pygame.font.SysFont(font_name, 24)
-            if available_font.render('试', True, (0, 0, 0)).get_width() > 10:
-                return font_name
-        except:
-            continue
-    
-    return None
+class SurfaceCache:
+    """容量有限的表面缓存，超出容量时淘汰最久未用的"""
 
-class Game:
-    def create_gradient_surface(self, width, height, start_color, end_color):
-        """创建渐变效果"""
-        surface = pygame.Surface((width, height))
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def get(self, key):
+        """返回缓存的表面并标记为最近使用，没有时返回None"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def put(self, key, surface):
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+class TextCache(SurfaceCache):
+    """按(字体, 文本, 颜色)缓存渲染好的文字表面"""
+
+    def __init__(self, max_size=256):
+        super().__init__(max_size)
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.get(key)
+        if surface is None:
+            surface = self.put(key, font.render(text, True, color))
+        return surface
+
+def render_gradient(width, height, start_color, end_color, mode='vertical'):
+    """生成渐变表面：vertical从上到下，horizontal从左到右，radial从中心到四角
+
+    有numpy时向量化计算颜色：线性渐变只算一行（列）并映射成像素值，再广播写入表面。
+    """
+    if mode not in GRADIENT_MODES:
+        raise ValueError(f"未知的渐变方向: {mode}")
+    surface = pygame.Surface((width, height))
+    if np is None:
+        return _render_gradient_slow(surface, start_color, end_color, mode)
+
+    start = np.array(start_color[:3], dtype=np.float64)
+    delta = np.array(end_color[:3], dtype=np.float64) - start
+    # 先算出一列（一行、或每个整数半径）的颜色并映射成像素值，再广播或查表写入整个表面
+    if mode == 'radial':
+        radius = math.hypot(width / 2, height / 2)
+        steps = np.arange(math.ceil(radius) + 1)
+        ramp = (start + delta * np.minimum(steps / radius, 1)[:, None]).astype(np.uint8)
+    else:
+        length = height if mode == 'vertical' else width
+        ramp = (start + delta * (np.arange(length) / length)[:, None]).astype(np.uint8)
+    values = pygame.surfarray.map_array(surface, ramp[None])[0]
+    pixels = pygame.surfarray.pixels2d(surface)
+    if mode == 'vertical':
+        pixels[:] = values[None, :]
+    elif mode == 'horizontal':
+        pixels[:] = values[:, None]
+    else:
+        # 像素中心到表面中心的距离取整作为下标，与逐圈绘制的同心圆一致
+        x = (np.arange(width, dtype=np.float32) + 0.5 - width / 2) ** 2
+        y = (np.arange(height, dtype=np.float32) + 0.5 - height / 2) ** 2
+        pixels[:] = values[np.sqrt(x[:, None] + y[None, :]).astype(np.intp)]
+    # 释放像素视图，解除表面的锁定
+    del pixels
+    return surface
+
+def _render_gradient_slow(surface, start_color, end_color, mode):
+    """没有numpy时的逐行绘制，径向渐变逐像素查表"""
+    width, height = surface.get_size()
+    if not width or not height:
+        return surface
+    def mix(ratio):
+        return [int(start + (end - start) * ratio)
+                for start, end in zip(start_color[:3], end_color[:3])]
+    if mode == 'vertical':
+        for y in range(height):
+            pygame.draw.line(surface, mix(y / height), (0, y), (width, y))
+    elif mode == 'horizontal':
+        for x in range(width):
+            pygame.draw.line(surface, mix(x / width), (x, 0), (x, height))
+    else:
+        # 与numpy版相同：像素中心到表面中心的距离取整作为下标查颜色，上下对称的两行只算一次
+        radius = math.hypot(width / 2, height / 2)
+        colors = [bytes(mix(min(1, r / radius))) for r in range(math.ceil(radius) + 1)]
+        dx = [(x + 0.5 - width / 2) ** 2 for x in range(width)]
+        rows = {}
+        lines = []
         for y in range(height):
-            ratio = y / height
-            color = [int(start + (end - start) * ratio) 
-                    for start, end in zip(start_color, end_color)]
-            pygame.draw.line(surface, color, (0, y), (width, y))
+            dy = (y + 0.5 - height / 2) ** 2
+            row = rows.get(dy)
+            if row is None:
+                row = rows[dy] = b''.join([colors[int(math.sqrt(d + dy))] for d in dx])
+            lines.append(row)
+        surface.blit(pygame.image.frombuffer(b''.join(lines), (width, height), 'RGB'), (0, 0))
+    return surface
+
+class GradientCache(SurfaceCache):
+    """按(宽, 高, 起始色, 结束色, 方向)缓存生成好的渐变表面"""
+
+    def __init__(self, max_size=32):
+        super().__init__(max_size)
+
+    def render(self, width, height, start_color, end_color, mode='vertical'):
+        key = (width, height, tuple(start_color), tuple(end_color), mode)
+        surface = self.get(key)
+        if surface is None:
+            surface = self.put(key, render_gradient(width, height, start_color, end_color, mode))
         return surface
 
+class Game:
+    def create_gradient_surface(self, width, height, start_color, end_color, mode='vertical'):
+        """创建渐变效果，相同尺寸和颜色的渐变只生成一次；返回的表面是共享的，不要直接修改"""
+        return self.gradient_cache.render(width, height, start_color, end_color, mode)
+
     def draw_instructions(self):
-        """绘制控制说明面板"""
+        """绘制控制说明面板：静态部分预先合成，每帧只绘制分数"""
+        if self.panel_surface is None:
+            self.panel_surface = self.build_panel()
+        self.screen.blit(self.panel_surface,
+                         (self.control_panel_x - 3, self.control_panel_y - 3))
+        
+        # 分数显示，数值文本由缓存提供，只在分数变化时重新渲染
+        y_offset = self.control_panel_y + 30
+        
+        # 当前得分
+        score_value = self.text_cache.render(self.score_font, str(self.snake.score), (255, 255, 255))
+        score_value_rect = score_value.get_rect(
+            right=self.control_panel_x + self.control_panel_width - 30,
+            centery=y_offset + 10
+        )
+        self.screen.blit(score_value, score_value_rect)
+        
+        # 最高分
+        y_offset += 40
+        high_score_value = self.text_cache.render(self.score_font, str(self.high_score), (255, 255, 255))
+        high_score_value_rect = high_score_value.get_rect(
+            right=self.control_panel_x + self.control_panel_width - 30,
+            centery=y_offset + 10
+        )
+        self.screen.blit(high_score_value, high_score_value_rect)
+
+    def build_panel(self):
+        """合成控制面板中不会变化的部分（阴影、边框、标题和按键说明）"""
+        # 面板表面包含四周3像素的阴影，px/py是面板主体在表面中的位置
+        surface = pygame.Surface((self.control_panel_width + 6, self.control_panel_height + 6))
+        surface.fill(BG_COLOR)
+        px = py = 3
+        
         # 创建主面板背景
         panel_bg = self.create_gradient_surface(
             self.control_panel_width,
@@ -289,76 +482,59 @@ class Game:
         shadow_surface = pygame.Surface((self.control_panel_width + 6, self.control_panel_height + 6))
         shadow_surface.fill((20, 20, 25))
         shadow_surface.set_alpha(100)
-        self.screen.blit(shadow_surface, 
-                        (self.control_panel_x - 3, self.control_panel_y - 3))
+        surface.blit(shadow_surface, (px - 3, py - 3))
         
         # 绘制主面板
-        self.screen.blit(panel_bg, (self.control_panel_x, self.control_panel_y))
+        surface.blit(panel_bg, (px, py))
         
         # 绘制边框光效
         for i in range(3):
-            alpha = 255 - i * 50
             color = (80 - i * 10, 80 - i * 10, 85 - i * 10)
             border_rect = pygame.Rect(
-                self.control_panel_x - i,
-                self.control_panel_y - i,
+                px - i,
+                py - i,
                 self.control_panel_width + i * 2,
                 self.control_panel_height + i * 2
             )
-            pygame.draw.rect(self.screen, color, border_rect, 1)
+            pygame.draw.rect(surface, color, border_rect, 1)
         
         # 分数显示
-        y_offset = self.control_panel_y + 30
+        y_offset = py + 30
         
         # 分数背景
         score_bg_rect = pygame.Rect(
-            self.control_panel_x + 20,
+            px + 20,
             y_offset - 10,
             self.control_panel_width - 40,
             80
         )
-        pygame.draw.rect(self.screen, (35, 35, 40), score_bg_rect, border_radius=10)
-        pygame.draw.rect(self.screen, (45, 45, 50), score_bg_rect, 1, border_radius=10)
+        pygame.draw.rect(surface, (35, 35, 40), score_bg_rect, border_radius=10)
+        pygame.draw.rect(surface, (45, 45, 50), score_bg_rect, 1, border_radius=10)
         
         # 当前得分
-        score_text = self.font.render("当前得分:", True, (200, 200, 200))
-        self.screen.blit(score_text, (self.control_panel_x + 30, y_offset))
-        
-        score_value = self.score_font.render(str(self.snake.score), True, (255, 255, 255))
-        score_value_rect = score_value.get_rect(
-            right=self.control_panel_x + self.control_panel_width - 30,
-            centery=y_offset + 10
-        )
-        self.screen.blit(score_value, score_value_rect)
+        score_text = self.text_cache.render(self.font, "当前得分:", (200, 200, 200))
+        surface.blit(score_text, (px + 30, y_offset))
         
         # 最高分
         y_offset += 40
-        high_score_text = self.font.render("最高分:", True, (200, 200, 200))
-        self.screen.blit(high_score_text, (self.control_panel_x + 30, y_offset))
-        
-        high_score_value = self.score_font.render(str(self.high_score), True, (255, 255, 255))
-        high_score_value_rect = high_score_value.get_rect(
-            right=self.control_panel_x + self.control_panel_width - 30,
-            centery=y_offset + 10
-        )
-        self.screen.blit(high_score_value, high_score_value_rect)
+        high_score_text = self.text_cache.render(self.font, "最高分:", (200, 200, 200))
+        surface.blit(high_score_text, (px + 30, y_offset))
         
         # 分隔线
         y_offset += 50
         for i in range(3):
-            alpha = 255 - i * 50
             color = (60 - i * 10, 60 - i * 10, 65 - i * 10)
             pygame.draw.line(
-                self.screen,
+                surface,
                 color,
-                (self.control_panel_x + 20, y_offset + i),
-                (self.control_panel_x + self.control_panel_width - 20, y_offset + i)
+                (px + 20, y_offset + i),
+                (px + self.control_panel_width - 20, y_offset + i)
             )
         
         # 控制说明标题
         y_offset += 20
-        title = self.title_font.render("控制", True, (255, 255, 255))
-        self.screen.blit(title, (self.control_panel_x + 20, y_offset))
+        title = self.text_cache.render(self.title_font, "控制", (255, 255, 255))
+        surface.blit(title, (px + 20, y_offset))
         
         # 方向键说明
         y_offset += 45
@@ -372,9 +548,9 @@ class Game:
         ]
         
         for key, desc in controls:
-            self.draw_keyboard_button(key, self.control_panel_x + 20, y_offset)
-            text = self.font.render(desc, True, (200, 200, 200))
-            self.screen.blit(text, (self.control_panel_x + 70, y_offset + 10))
+            self.draw_keyboard_button(key, px + 20, y_offset, surface)
+            text = self.text_cache.render(self.font, desc, (200, 200, 200))
+            surface.blit(text, (px + 70, y_offset + 10))
             y_offset += spacing
         
         # 其他控制键
@@ -382,32 +558,50 @@ class Game:
         other_controls = [
             ("空格键", "暂停游戏"),
             ("R键", "重新开始"),
+            ("A键", "自动驾驶"),
             ("ESC", "退出游戏")
         ]
         
         for key, desc in other_controls:
-            self.draw_keyboard_button(key, self.control_panel_x + 20, y_offset)
-            text = self.font.render(desc, True, (200, 200, 200))
-            self.screen.blit(text, (self.control_panel_x + 70, y_offset + 10))
+            self.draw_keyboard_button(key, px + 20, y_offset, surface)
+            text = self.text_cache.render(self.font, desc, (200, 200, 200))
+            surface.blit(text, (px + 70, y_offset + 10))
             y_offset += spacing
+        return surface.convert()
 
     def draw_game_area(self):
-        """绘制游戏区域、网格和边框"""
+        """绘制游戏区域，背景只在首次使用或尺寸、主题变化时重新生成"""
+        key = (WINDOW_WIDTH, WINDOW_HEIGHT, self.game_padding)
+        if self.background is None or self.background_key != key:
+            self.background = self.build_background()
+            self.background_key = key
+        self.screen.blit(self.background, (0, 0))
+
+    def invalidate_background(self):
+        """窗口尺寸或主题变化后调用，下一帧重新生成背景和面板"""
+        self.background = None
+        self.panel_surface = None
+
+    def build_background(self):
+        """预先渲染网格、边框和光晕，返回与显示格式一致的表面"""
+        surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        
         # 主背景
-        pygame.draw.rect(self.screen, (30, 30, 35),
+        pygame.draw.rect(surface, (30, 30, 35),
                         (0, 0, WINDOW_WIDTH, WINDOW_HEIGHT))
         
-        # 绘制网格背景
-        grid_size = 20
-        for x in range(self.game_padding, WINDOW_WIDTH - self.game_padding, grid_size):
-            for y in range(self.game_padding, WINDOW_HEIGHT - self.game_padding, grid_size):
-                # 交替使用稍深和稍浅的颜色创建棋盘效果
-                if (x + y) // grid_size % 2 == 0:
-                    color = (35, 35, 40)
-                else:
-                    color = (32, 32, 37)
-                pygame.draw.rect(self.screen, color,
-                               (x, y, grid_size, grid_size))
+        # 绘制网格背景，像素画布模式下格子太小，由画布自己填充空地
+        grid_size = self.cell_size
+        if self.pixel_board is None:
+            for x in range(self.board_rect.left, self.board_rect.right, grid_size):
+                for y in range(self.board_rect.top, self.board_rect.bottom, grid_size):
+                    # 交替使用稍深和稍浅的颜色创建棋盘效果
+                    if (x + y) // grid_size % 2 == 0:
+                        color = (35, 35, 40)
+                    else:
+                        color = (32, 32, 37)
+                    pygame.draw.rect(surface, color,
+                                   (x, y, grid_size, grid_size))
         
         # 外部装饰边框
         border_colors = [
@@ -419,7 +613,7 @@ class Game:
         
         # 绘制渐变边框
         for i, color in enumerate(border_colors):
-            pygame.draw.rect(self.screen, color,
+            pygame.draw.rect(surface, color,
                            (i, i,
                             WINDOW_WIDTH - i*2,
                             WINDOW_HEIGHT - i*2),
@@ -434,7 +628,7 @@ class Game:
         ]
         
         for i, color in enumerate(metallic_colors):
-            pygame.draw.rect(self.screen, color,
+            pygame.draw.rect(surface, color,
                            (self.game_padding - inner_border + i,
                             self.game_padding - inner_border + i,
                             WINDOW_WIDTH - (self.game_padding - inner_border + i)*2,
@@ -473,7 +667,7 @@ class Game:
         
         # 绘制加粗的角落装饰
         for start, end in corners:
-            pygame.draw.line(self.screen, corner_color, start, end, corner_thickness)
+            pygame.draw.line(surface, corner_color, start, end, corner_thickness)
         
         # 添加内部光晕效果
         glow_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
@@ -485,34 +679,23 @@ class Game:
             WINDOW_HEIGHT - 2 * (self.game_padding - 4)
         )
         pygame.draw.rect(glow_surface, glow_color, glow_rect, 4)
-        self.screen.blit(glow_surface, (0, 0))
+        surface.blit(glow_surface, (0, 0))
+        return surface.convert()
 
-    def __init__(self):
-        pygame.init()
+    def __init__(self, grid_width=PLAYABLE_WIDTH, grid_height=PLAYABLE_HEIGHT):
+        pygame.display.init()
         # 设置窗口和面板尺寸
         self.window_width = WINDOW_WIDTH + 350
         self.window_height = WINDOW_HEIGHT
         self.screen = pygame.display.set_mode((self.window_width, self.window_height))
         pygame.display.set_caption("贪吃蛇")
         
-        # 初始化字体 -使用支持中文的字体
-        try:
-            # 尝试使用系统中文字体
-            self.title_font = pygame.font.Font("C:/Windows/Fonts/msyh.ttc", 24)  # 微软雅黑
-            self.font = pygame.font.Font("C:/Windows/Fonts/msyh.ttc", 16)
-            self.score_font = pygame.font.Font("C:/Windows/Fonts/msyh.ttc", 28)
-        except:
-            try:
-                # 备选：使用系统默认中文字体
-                self.title_font = pygame.font.Font("C:/Windows/Fonts/simhei.ttf", 24)  # 黑体
-                self.font = pygame.font.Font("C:/Windows/Fonts/simhei.ttf", 16)
-                self.score_font = pygame.font.Font("C:/Windows/Fonts/simhei.ttf", 28)
-            except:
-                # 如果都失败了，使用系统默认字体
-                print("警告：无法加载文字体，可无法正确显示中文")
-                self.title_font = pygame.font.SysFont('arial', 24)
-                self.font = pygame.font.SysFont('arial', 16)
-                self.score_font = pygame.font.SysFont('arial', 28)
+        # 初始化字体 -使用支持中文的字体，查找结果缓存在磁盘上
+        if find_font() is None:
+            print("警告：无法加载文字体，可无法正确显示中文")
+        self.title_font = load_font(24)
+        self.font = load_font(16)
+        self.score_font = load_font(28)
         
         # 初始化控制面板尺寸和位置
         self.control_panel_width = 300
@@ -520,21 +703,63 @@ class Game:
         self.control_panel_x = WINDOW_WIDTH + 25
         self.control_panel_y = 20
         
+        # 棋盘尺寸可配置：格子放得下贴图时逐节绘制，否则改用像素画布整体缩放
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        area = pygame.Rect(MARGIN, MARGIN, WINDOW_WIDTH - 2 * MARGIN, WINDOW_HEIGHT - 2 * MARGIN)
+        self.cell_size = min(GRID_SIZE, area.width // grid_width, area.height // grid_height)
+        if self.cell_size >= SPRITE_MIN_CELL:
+            self.pixel_board = None
+            self.board_rect = pygame.Rect(0, 0, grid_width * self.cell_size,
+                                          grid_height * self.cell_size)
+            self.board_rect.center = area.center
+        else:
+            self.pixel_board = PixelBoard(grid_width, grid_height, area)
+            self.board_rect = self.pixel_board.rect
+        
         # 初始化游戏对象
-        self.snake = Snake()
-        self.food = Food()
+        self.snake, self.food = self.create_pieces()
+        self.sprites = SpriteAtlas(self.snake, self.food) if self.pixel_board is None else None
         self.clock = pygame.time.Clock()
         self.speed = 6.0  # 降低初始速度（原来是8.0或更高）
-        self.high_score = 0
+        # 每局结束时写入本地存档，最高分和排行榜从存档读取
+        self.store = ScoreStore()
+        self.high_score = self.store.best(GAME_NAMES[GAME_SNAKE])
+        
+        # 逻辑按self.speed的频率推进，渲染和输入按显示帧率运行
+        self.timestep = FixedTimestep(1000.0 / self.speed)
+        # 两次移动之间按下的方向键排队，每个逻辑步消费一个
+        self.turn_queue = deque()
+        # 自动驾驶：按A键切换，每个逻辑步由寻路结果转向；
+        # 逐格的坐标、邻居和回路表在大棋盘上要建好几秒，第一次打开时才创建
+        self.autopilot = None
+        self.autopilot_on = False
+        # 性能分析：F3显示叠加层，F4导出trace
+        self.profiler = Profiler()
         
         # 游戏状态
         self.game_over = False
         self.paused = False
         self.show_final_score = False
+        self.won = False
+        self.begin_round()
+        self.reset_food()
+        if self.pixel_board is not None:
+            self.pixel_board.rebuild(self.snake)
         
         # 更新游戏区域内边距
         self.game_padding = 20
         
+        # 静态背景缓存
+        self.background = None
+        self.background_key = None
+        
+        # 文字缓存、渐变缓存、按键字体缓存和预先合成的控制面板
+        self.text_cache = TextCache()
+        self.gradient_cache = GradientCache()
+        self.button_fonts = {}
+        self.panel_surface = None
+        
         # 更新游戏区域边界
         self.game_area = {
             'left': self.game_padding,
@@ -550,19 +775,64 @@ class Game:
             self.high_score = self.snake.score
         
         # 重置蛇和食物
-        self.snake = Snake()
-        self.food = Food()
+        self.snake, self.food = self.create_pieces()
         self.speed = 6.0  # 降低初始速度（原来是8.0或更高）
         self.game_over = False
         self.show_final_score = False
+        self.won = False
+        self.begin_round()
+        self.reset_food()
+        if self.pixel_board is not None:
+            self.pixel_board.rebuild(self.snake)
         self.paused = False
+        self.timestep.reset()
+        self.turn_queue.clear()
+        if self.autopilot is not None:
+            self.autopilot.reset()
+
+    def toggle_autopilot(self):
+        """切换自动驾驶，第一次打开时创建Autopilot"""
+        if self.autopilot is None:
+            self.autopilot = Autopilot(self.grid_width, self.grid_height)
+        self.autopilot_on = not self.autopilot_on
+        self.turn_queue.clear()
+
+    def create_pieces(self):
+        """按当前棋盘尺寸和格子大小创建蛇和食物"""
+        origin = self.board_rect.topleft
+        return (Snake(self.grid_width, self.grid_height, self.cell_size, origin),
+                Food(self.grid_width, self.grid_height, self.cell_size, origin))
+
+    def begin_round(self, seed=None):
+        """为新的一局设置随机种子并开始录制回放"""
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.ticks = 0  # 本局蛇移动的步数，回放以此为时间轴
+        self.round_start = time.monotonic()
+        self.recorder = ReplayRecorder(GAME_SNAKE, self.seed, self.grid_width, self.grid_height)
+
+    def end_round(self):
+        """结束录制并保存回放，本局记录交给存档在后台写入"""
+        try:
+            save_replay(self.recorder.finish(self.ticks, self.snake.score))
+        except OSError as e:
+            print("回放保存失败:", e)
+        self.store.add(GAME_NAMES[GAME_SNAKE], self.snake.score, time.monotonic() - self.round_start,
+                       length=self.snake.length, seed=self.seed)
+
+    def queue_turn(self, direction):
+        """记录一次转向，相对队列中最后一个方向判断是否掉头"""
+        last = self.turn_queue[-1] if self.turn_queue else self.snake.direction
+        if direction == last or (-direction[0], -direction[1]) == last:
+            return
+        if len(self.turn_queue) < 3:
+            self.turn_queue.append(direction)
 
     def check_food_collision(self):
         """检查蛇是否吃到食物，调整速度增长"""
         snake_head = self.snake.positions[0]
-        food_grid = self.food.grid_pos
         
-        if snake_head == food_grid:
+        if snake_head == self.food.cell:
             self.snake.length += 1
             self.snake.score += 10
             if self.speed < 12.0:  # 降低最大速度（原来是15.0）
@@ -570,12 +840,14 @@ class Game:
             self.reset_food()
 
     def reset_food(self):
-        """重置食物位置，确保不与蛇重叠"""
-        while True:
-            self.food.reset()
-            # 检查新的食物位置是否与蛇身重叠
-            if self.food.grid_pos not in self.snake.positions:
-                break
+        """从空闲格子中选取食物位置，棋盘被占满时判定获胜"""
+        if not self.food.reset(self.snake.free_cells, self.rng):
+            self.won = True
+            self.game_over = True
+            self.show_final_score = True
+            if self.snake.score > self.high_score:
+                self.high_score = self.snake.score
+            self.end_round()
 
     def draw_score(self):
         """在右侧绘制得分面板"""
@@ -631,25 +903,27 @@ class Game:
                         self.snake.turn(RIGHT)
 
     def pause_game(self):
-        paused = True
+        """暂停直到按下空格：提示只绘制一次，之后阻塞等待按键"""
         pause_text = self.font.render('游戏暂停 - 按空格键继续', True, WHITE)
         text_rect = pause_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2))
+        self.screen.blit(pause_text, text_rect)
+        pygame.display.flip()
         
-        while paused:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+        while True:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.VIDEOEXPOSE:
+                pygame.display.flip()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    break
+                elif event.key == pygame.K_ESCAPE:
                     pygame.quit()
                     sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        paused = False
-                    elif event.key == pygame.K_ESCAPE:
-                        pygame.quit()
-                        sys.exit()
-            
-            self.screen.blit(pause_text, text_rect)
-            pygame.display.flip()
-            self.clock.tick(60)
+        # 丢弃暂停期间的时间
+        self.clock.tick()
 
     def draw_arrow(self, surface, color, direction, x, y, size=20):
         """绘制箭头"""
@@ -664,8 +938,10 @@ class Game:
         
         pygame.draw.polygon(surface, color, points)
 
-    def draw_keyboard_button(self, key, x, y):
+    def draw_keyboard_button(self, key, x, y, surface=None):
         """绘制类似键盘按键的效果"""
+        if surface is None:
+            surface = self.screen
         button_width = 40
         button_height = 40
         
@@ -676,15 +952,15 @@ class Game:
         text_color = (220, 220, 220)
         
         # 按键主体
-        pygame.draw.rect(self.screen, key_color, 
+        pygame.draw.rect(surface, key_color, 
                         (x, y, button_width, button_height))
         
         # 按键顶部高光
-        pygame.draw.rect(self.screen, highlight_color, 
+        pygame.draw.rect(surface, highlight_color, 
                         (x, y, button_width, button_height//3))
         
         # 按键边框
-        pygame.draw.rect(self.screen, border_color, 
+        pygame.draw.rect(surface, border_color, 
                         (x, y, button_width, button_height), 1)
 
         # 使用简单的箭头符号
@@ -695,6 +971,7 @@ class Game:
             "→": "→",
             "空格键": "Space",
             "R键": "R",
+            "A键": "A",
             "ESC": "Esc"
         }
 
@@ -706,18 +983,21 @@ class Game:
         else:
             font_size = 20
             
-        button_font = pygame.font.SysFont('arial', font_size)
-        text = button_font.render(symbol, True, text_color)
+        button_font = self.button_fonts.get(font_size)
+        if button_font is None:
+            button_font = load_font(font_size, 'latin')
+            self.button_fonts[font_size] = button_font
+        text = self.text_cache.render(button_font, symbol, text_color)
         text_rect = text.get_rect(center=(x + button_width//2, y + button_height//2))
-        self.screen.blit(text, text_rect)
+        surface.blit(text, text_rect)
         
         # 添加按键阴影效果
         shadow_color = (20, 20, 25)
-        pygame.draw.line(self.screen, shadow_color,
+        pygame.draw.line(surface, shadow_color,
                         (x, y + button_height),
                         (x + button_width, y + button_height),
                         2)
-        pygame.draw.line(self.screen, shadow_color,
+        pygame.draw.line(surface, shadow_color,
                         (x + button_width, y),
                         (x + button_width, y + button_height),
                         2)
@@ -732,7 +1012,7 @@ class Game:
         
         # 绘制游戏结束面板
         panel_width = 400
-        panel_height = 300
+        panel_height = 430
         panel_x = (WINDOW_WIDTH - panel_width) // 2
         panel_y = (WINDOW_HEIGHT - panel_height) // 2
         
@@ -743,7 +1023,7 @@ class Game:
                         (panel_x, panel_y, panel_width, panel_height), 2)
         
         # 游戏结束标题
-        title = self.title_font.render("游戏结束", True, (255, 255, 255))
+        title = self.title_font.render("恭喜通关" if self.won else "游戏结束", True, (255, 255, 255))
         title_rect = title.get_rect(centerx=WINDOW_WIDTH//2, y=panel_y + 30)
         self.screen.blit(title, title_rect)
         
@@ -757,27 +1037,56 @@ class Game:
         high_score_rect = high_score_text.get_rect(centerx=WINDOW_WIDTH//2, y=panel_y + 150)
         self.screen.blit(high_score_text, high_score_rect)
         
+        # 排行榜，查询结果由存档缓存
+        board_x = panel_x + 80
+        y = panel_y + 185
+        self.screen.blit(self.text_cache.render(self.font, "排行榜", (255, 255, 255)), (board_x, y))
+        for rank, record in enumerate(self.store.top(GAME_NAMES[GAME_SNAKE]), 1):
+            y += 24
+            when = time.strftime('%m-%d %H:%M', time.localtime(record.created))
+            for text, x in ((f"{rank}.", board_x), (str(record.score), board_x + 30),
+                            (when, board_x + 120)):
+                self.screen.blit(self.text_cache.render(self.font, text, (200, 200, 200)), (x, y))
+        
         # 分割线
         pygame.draw.line(self.screen, (60, 60, 65),
-                        (panel_x + 50, panel_y + 200),
-                        (panel_x + panel_width - 50, panel_y + 200))
+                        (panel_x + 50, panel_y + 330),
+                        (panel_x + panel_width - 50, panel_y + 330))
         
         # 操作提示
         hint_text = self.font.render("按 R 键开始新游戏", True, (255, 255, 255))
-        hint_rect = hint_text.get_rect(centerx=WINDOW_WIDTH//2, y=panel_y + 230)
+        hint_rect = hint_text.get_rect(centerx=WINDOW_WIDTH//2, y=panel_y + 360)
         self.screen.blit(hint_text, hint_rect)
         
         quit_text = self.font.render("按 ESC 键退出游戏", True, (150, 150, 150))
-        quit_rect = quit_text.get_rect(centerx=WINDOW_WIDTH//2, y=panel_y + 260)
+        quit_rect = quit_text.get_rect(centerx=WINDOW_WIDTH//2, y=panel_y + 390)
         self.screen.blit(quit_text, quit_rect)
 
     def run(self):
+        profiler = self.profiler
+        idle_drawn = False  # 暂停或结束画面已经画好，画面不会再自己变化
         running = True
         while running:
             try:
-                for event in pygame.event.get():
+                profiler.begin_frame()
+                if idle_drawn and (self.paused or self.show_final_score):
+                    # 空闲时阻塞等待输入，不再按帧率空转；醒来后丢弃等待的时间
+                    events = [pygame.event.wait(IDLE_TIMEOUT)]
+                    self.clock.tick()
+                    delta_time = 0
+                    profiler.mark('idle.wait')
+                else:
+                    # 按显示帧率轮询输入和渲染
+                    events = []
+                    delta_time = self.clock.tick(RENDER_FPS)
+                    profiler.mark('clock.tick')
+                events.extend(pygame.event.get())
+                
+                for event in events:
                     if event.type == pygame.QUIT:
                         running = False
+                    elif event.type == pygame.VIDEORESIZE:
+                        self.invalidate_background()
                     elif event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_ESCAPE:
                             running = False
@@ -786,48 +1095,94 @@ class Game:
                         elif event.key == pygame.K_r:
                             # 重置游戏状态
                             self.reset()
-                        elif not self.paused and not self.game_over:
-                            if event.key == pygame.K_UP and self.snake.direction != (0, 1):
-                                self.snake.direction = (0, -1)
-                            elif event.key == pygame.K_DOWN and self.snake.direction != (0, -1):
-                                self.snake.direction = (0, 1)
-                            elif event.key == pygame.K_LEFT and self.snake.direction != (1, 0):
-                                self.snake.direction = (-1, 0)
-                            elif event.key == pygame.K_RIGHT and self.snake.direction != (-1, 0):
-                                self.snake.direction = (1, 0)
+                        elif event.key == pygame.K_a:
+                            self.toggle_autopilot()
+                        elif event.key == pygame.K_F3:
+                            profiler.toggle()
+                        elif event.key == pygame.K_F4 and profiler.enabled:
+                            print("trace已保存:", profiler.dump_trace())
+                        elif not self.paused and not self.game_over and not self.autopilot_on:
+                            if event.key == pygame.K_UP:
+                                self.queue_turn(UP)
+                            elif event.key == pygame.K_DOWN:
+                                self.queue_turn(DOWN)
+                            elif event.key == pygame.K_LEFT:
+                                self.queue_turn(LEFT)
+                            elif event.key == pygame.K_RIGHT:
+                                self.queue_turn(RIGHT)
+                profiler.mark('events')
 
                 self.screen.fill(BG_COLOR)
                 self.draw_game_area()
+                profiler.mark('draw.background')
                 
                 if not self.game_over and not self.paused:
-                    if not self.snake.update():
-                        self.game_over = True
-                        self.show_final_score = True
-                        # 更新最高分
-                        if self.snake.score > self.high_score:
-                            self.high_score = self.snake.score
-                    else:
+                    # 按固定步长推进蛇的移动，速度变化立即生效
+                    self.timestep.set_rate(self.speed)
+                    for _ in range(self.timestep.advance(delta_time)):
+                        direction = self.snake.direction
+                        if self.autopilot_on:
+                            self.snake.turn(self.autopilot.next_direction(self.snake, self.food.cell))
+                        elif self.turn_queue:
+                            self.snake.direction = self.turn_queue.popleft()
+                        # 只有方向改变时才写入回放
+                        if self.snake.direction != direction:
+                            self.recorder.record(self.ticks, DIRECTIONS.index(self.snake.direction))
+                        self.ticks += 1
+                        old_head = self.snake.positions[0]
+                        old_tail = self.snake.positions[-1]
+                        if not self.snake.update():
+                            self.game_over = True
+                            self.show_final_score = True
+                            # 更新最高分
+                            if self.snake.score > self.high_score:
+                                self.high_score = self.snake.score
+                            self.end_round()
+                            break
+                        if self.pixel_board is not None:
+                            self.pixel_board.step(self.snake, old_head, old_tail)
                         self.check_food_collision()
+                else:
+                    self.timestep.reset()
+                profiler.mark('simulate')
                 
-                self.snake.render(self.screen)
-                self.food.render(self.screen)
+                self.draw_sprites()
+                profiler.mark('draw.sprites')
                 self.draw_instructions()
+                profiler.mark('draw.panel')
                 
                 if self.show_final_score:
                     self.draw_final_score()
                 elif self.paused:
                     self.draw_pause()
+                profiler.mark('draw.overlay')
+                if profiler.enabled:
+                    profiler.draw_overlay(self.screen, (self.game_padding + 5, self.game_padding + 5))
+                    profiler.mark('draw.profiler')
                 
                 pygame.display.flip()
-                self.clock.tick(self.speed)
+                profiler.mark('display.flip')
+                idle_drawn = self.paused or self.show_final_score
                 
             except Exception as e:
                 print("戏发生错误:", str(e))
                 running = False
         
+        self.store.close()
         pygame.quit()
         sys.exit()
 
+    def draw_sprites(self):
+        """一次Surface.blits调用绘制蛇和食物，大棋盘改为绘制像素画布"""
+        if self.pixel_board is not None:
+            self.pixel_board.render(self.screen, self.food)
+            return
+        blits = self.snake.blit_list(self.sprites)
+        # 通关后没有食物，不再画留在原处的旧贴图
+        if self.food.cell is not None:
+            blits.append(self.food.blit_item(self.sprites))
+        self.screen.blits(blits, doreturn=False)
+
     def draw_pause(self):
         """绘制暂停界面"""
         # 创建半透明背景
@@ -847,5 +1202,9 @@ class Game:
         self.screen.blit(hint_text, hint_rect)
 
 if __name__ == '__main__':
-    game = Game()
+    parser = argparse.ArgumentParser(description='贪吃蛇')
+    parser.add_argument('--width', type=int, default=PLAYABLE_WIDTH, help='棋盘列数')
+    parser.add_argument('--height', type=int, default=PLAYABLE_HEIGHT, help='棋盘行数')
+    args = parser.parse_args()
+    game = Game(args.width, args.height)
     game.run()
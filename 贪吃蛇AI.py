@@ -0,0 +1,341 @@
+from collections import deque
+from itertools import islice
+
+from 贪吃蛇引擎 import DOWN, LEFT, RIGHT, UP
+
+# 贪吃蛇自动驾驶：沿哈密顿回路行进，并利用到食物的距离场抄近路
+# 只要蛇身沿回路顺序排列、抄近路时不越过蛇尾，蛇头就一定能追上自己的尾巴，这一安全检查是O(1)的
+# 距离场随蛇头前进和蛇尾让出格子增量更新，需要整体重算时按节点预算分摊到多个tick
+# 没有回路或蛇身不沿回路排列时改为逐个候选格子检查能否追到蛇尾，每次检查同样受节点预算限制
+
+# 距离场中不可达或被占据的格子
+UNREACHABLE = 1 << 30
+
+# 抄近路时与蛇尾在回路上至少保持的距离
+TAIL_SLACK = 2
+
+# 蛇身没有沿回路排列时，每隔多少个tick重新检查一次
+ORDER_CHECK_INTERVAL = 32
+
+# 没有回路时，连续这么多圈（每圈为格子数个tick）没吃到食物就放弃安全检查，直接朝食物走
+STALL_LAPS = 2
+
+
+def hamiltonian_cycle(width, height):
+    """构造经过所有格子的回路，返回按回路顺序排列的格子；宽高都是奇数时不存在，返回None"""
+    if width < 2 or height < 2 or (width % 2 and height % 2):
+        return None
+    if height % 2:
+        return [(x, y) for y, x in hamiltonian_cycle(height, width)]
+    # 第0列留作回程通道，其余列逐行蛇形扫描
+    order = []
+    for y in range(height):
+        xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        order.extend((x, y) for x in xs)
+    order.extend((0, y) for y in range(height - 1, -1, -1))
+    return order
+
+
+class Autopilot:
+    """为SnakeBody选择下一步的方向，结果交给Snake.turn"""
+
+    def __init__(self, width, height, budget=300, dense_ratio=0.5):
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        self.budget = budget            # 每次搜索（距离场分段、追尾检查）最多处理的节点数
+        self.dense_ratio = dense_ratio  # 蛇长超过这个比例后不再抄近路
+
+        # 格子编号为y*width+x，预先算好坐标和邻居
+        self.coords = [(i % width, i // width) for i in range(self.num_cells)]
+        self.neighbors = [
+            tuple(
+                (y + dy) * width + (x + dx)
+                for dx, dy in (UP, DOWN, LEFT, RIGHT)
+                if 0 <= x + dx < width and 0 <= y + dy < height
+            )
+            for x, y in self.coords
+        ]
+
+        # 回路上的序号和下一格；宽高都是奇数时没有回路，只能用搜索判断安全
+        cycle = hamiltonian_cycle(width, height)
+        self.cycle_index = None
+        self.cycle_next = None
+        if cycle is not None:
+            self.cycle_index = [0] * self.num_cells
+            self.cycle_next = [0] * self.num_cells
+            for i, (x, y) in enumerate(cycle):
+                next_x, next_y = cycle[(i + 1) % len(cycle)]
+                self.cycle_index[y * width + x] = i
+                self.cycle_next[y * width + x] = next_y * width + next_x
+
+        self.reset()
+
+    def reset(self):
+        """丢弃缓存的状态，下一次调用时重新同步"""
+        self.blocked = bytearray(self.num_cells)  # 蛇身占据的格子，随蛇头蛇尾增量更新
+        self.dist = None        # 到食物的距离场，被占据的格子为UNREACHABLE
+        self.field_food = None  # 距离场对应的食物格子
+        self.stale = False      # 距离场可能偏小，需要在后台重算
+        self.pending = None     # 正在分摊计算的距离场
+        self.pending_food = None
+        self.seen_head = None
+        self.seen_tail = None
+        self.seen_size = 0
+        self.ordered = False    # 蛇身是否沿回路顺序排列
+        self.order_check = 0
+        self.stall = 0          # 没有吃到食物的连续tick数
+        self.stall_length = 0
+
+    def next_direction(self, snake, food):
+        """返回下一步的方向；food是食物的网格坐标，没有食物时为None"""
+        width = self.width
+        head_x, head_y = snake.positions[0]
+        tail_x, tail_y = snake.positions[-1]
+        head = head_y * width + head_x
+        tail = tail_y * width + tail_x
+        if food is not None:
+            food = food[1] * width + food[0]
+
+        self._sync(snake, head, tail)
+        self._update_field(food)
+
+        if snake.length != self.stall_length:
+            self.stall = 0
+            self.stall_length = snake.length
+        else:
+            self.stall += 1
+
+        if self.ordered:
+            target = self._cycle_move(snake, head, tail, food)
+        else:
+            target = self._safe_move(snake, head, tail)
+            if self.cycle_index is not None:
+                # 蛇身可能在追尾的过程中重新沿回路排好，排好后切回O(1)的回路模式
+                self.order_check += 1
+                if self.order_check >= ORDER_CHECK_INTERVAL:
+                    self.order_check = 0
+                    self.ordered = self._is_ordered(snake)
+        if target is None:
+            return snake.direction
+
+        target_x, target_y = self.coords[target]
+        return (target_x - head_x, target_y - head_y)
+
+    def _sync(self, snake, head, tail):
+        """根据上次调用以来蛇头蛇尾的变化增量更新距离场"""
+        size = len(snake.positions)
+        if head == self.seen_head and size == self.seen_size:
+            return
+        one_step = (
+            self.seen_head is not None and size >= self.seen_size and
+            self.coords[self.seen_head] == (snake.positions[1] if size > 1 else None)
+        ) or (size == 1 == self.seen_size and self.seen_head in self.neighbors[head])
+        if not one_step:
+            # 第一次调用、重新开始或跳过了若干步：全部重新同步
+            blocked = self.blocked = bytearray(self.num_cells)
+            for x, y in snake.positions:
+                blocked[y * self.width + x] = 1
+            self.dist = None
+            self.pending = None
+            self.stale = False
+            self.ordered = self._is_ordered(snake)
+            self.order_check = 0
+        else:
+            blocked = self.blocked
+            blocked[head] = 1
+            freed = self.seen_tail
+            freed = freed if freed != tail and self.coords[freed] not in snake.occupied else None
+            if freed is not None:
+                blocked[freed] = 0
+            dist = self.dist
+            if dist is not None:
+                # 蛇头进入的格子不再可走；没有沿距离场下降时，其它格子的距离可能偏小，安排重算
+                downhill = dist[head] <= min(dist[n] for n in self.neighbors[self.seen_head])
+                dist[head] = UNREACHABLE
+                if not downhill:
+                    self.stale = True
+                # 蛇尾让出的格子只会让距离变短，从这里局部向外传播
+                if freed is not None:
+                    self._relax(freed)
+        self.seen_head = head
+        self.seen_tail = tail
+        self.seen_size = size
+
+    def _relax(self, start):
+        """格子被让出后沿邻居传播更短的距离，传播超出预算时改为整体重算"""
+        dist = self.dist
+        best = min(dist[n] for n in self.neighbors[start])
+        if best >= UNREACHABLE:
+            return
+        dist[start] = best + 1
+        queue = deque([start])
+        neighbors = self.neighbors
+        blocked = self.blocked
+        work = 0
+        while queue:
+            cell = queue.popleft()
+            value = dist[cell] + 1
+            for n in neighbors[cell]:
+                if dist[n] > value and not blocked[n]:
+                    dist[n] = value
+                    queue.append(n)
+            work += 1
+            if work > self.budget:
+                self.dist = None
+                return
+
+    def _update_field(self, food):
+        """距离场缺失或过期时，按预算推进一段广度优先搜索"""
+        if food is None:
+            self.dist = None
+            self.pending = None
+            return
+        if food != self.field_food:
+            self.dist = None
+        if self.dist is not None and not self.stale:
+            return
+        if self.pending is None or self.pending_food != food:
+            self.pending = self._bfs(food)
+            self.pending_food = food
+        result = next(self.pending)
+        if result is not None:
+            self.dist = result
+            self.field_food = food
+            self.stale = False
+            self.pending = None
+
+    def _bfs(self, food):
+        """从食物出发的广度优先搜索，每处理budget个节点让出一次，完成时产出距离场"""
+        dist = [UNREACHABLE] * self.num_cells
+        dist[food] = 0
+        queue = deque([food])
+        neighbors = self.neighbors
+        blocked = self.blocked
+        work = 0
+        while queue:
+            cell = queue.popleft()
+            value = dist[cell] + 1
+            for n in neighbors[cell]:
+                if dist[n] == UNREACHABLE and not blocked[n]:
+                    dist[n] = value
+                    queue.append(n)
+            work += 1
+            if work >= self.budget:
+                work = 0
+                yield None
+        yield dist
+
+    def _is_ordered(self, snake):
+        """检查蛇身从头到尾是否沿回路逆向排列，且总跨度不超过一圈"""
+        if self.cycle_index is None:
+            return False
+        index = self.cycle_index
+        width = self.width
+        n = self.num_cells
+        x, y = snake.positions[0]
+        previous = index[y * width + x]
+        span = 0
+        for x, y in islice(snake.positions, 1, None):
+            current = index[y * width + x]
+            span += (previous - current) % n or n
+            previous = current
+        return span < n
+
+    def _behind(self, snake, head):
+        """蛇长大于1时Snake.turn不允许掉头，返回蛇头正后方的格子；可以掉头或后方出界时返回None
+
+        刚吃到食物的长度1的蛇还没长出第二节，后方的格子看起来是空的，必须单独排除。
+        """
+        if snake.length <= 1:
+            return None
+        x, y = self.coords[head]
+        x -= snake.direction[0]
+        y -= snake.direction[1]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def _cycle_move(self, snake, head, tail, food):
+        """回路模式：默认走回路的下一格，棋盘不拥挤时在安全范围内抄近路
+
+        能沿最短路径前进时走最短路径，否则选沿回路跳得最远的格子。
+        """
+        best = self.cycle_next[head]
+        n = self.num_cells
+        if snake.length >= self.dense_ratio * n:
+            return best
+
+        index = self.cycle_index
+        head_index = index[head]
+        rel_tail = (index[tail] - head_index) % n or n
+        rel_food = (index[food] - head_index) % n if food is not None else n
+        growth = snake.length - len(snake.positions)
+        # 沿回路不能越过蛇尾（留出生长的余量），也不要越过食物
+        limit = min(rel_tail - growth - TAIL_SLACK, rel_food + 1)
+        dist = self.dist
+        neighbors = self.neighbors[head]
+        shortest = min(dist[cell] for cell in neighbors) if dist is not None else UNREACHABLE
+        best_rel = 1
+        blocked = self.blocked
+        behind = self._behind(snake, head)
+        for cell in neighbors:
+            if blocked[cell] or cell == behind:
+                continue
+            rel = (index[cell] - head_index) % n
+            if rel >= limit:
+                continue
+            if shortest < UNREACHABLE and dist[cell] == shortest:
+                return cell
+            if rel > best_rel:
+                best = cell
+                best_rel = rel
+        return best
+
+    def _safe_move(self, snake, head, tail):
+        """没有可用回路时：按到食物的距离从近到远，选走过去后仍能到达蛇尾的格子
+
+        只追蛇尾可能永远绕圈吃不到食物（宽高都是奇数的棋盘上常见），
+        连续STALL_LAPS圈没有进展时放弃安全检查，直接走离食物最近的格子，保证每局都会结束。
+        """
+        tail_moves = len(snake.positions) >= snake.length
+        dist = self.dist
+        behind = self._behind(snake, head)
+        candidates = []
+        for cell in self.neighbors[head]:
+            if cell == behind or (self.blocked[cell] and not (tail_moves and cell == tail)):
+                continue
+            candidates.append((dist[cell] if dist is not None else UNREACHABLE, cell))
+        candidates.sort()
+        if candidates and self.stall > STALL_LAPS * self.num_cells:
+            return candidates[0][1]
+        for _, cell in candidates:
+            if self._reaches_tail(cell, snake, tail):
+                return cell
+        return candidates[0][1] if candidates else None
+
+    def _reaches_tail(self, start, snake, tail):
+        """蛇头移到start之后，能否沿空格走到蛇尾
+
+        与距离场一样最多处理budget个格子：处理完预算时能到达的空地已经足够大，视为安全，
+        这样每个候选格子的检查都有上限，大棋盘上不会整体泛洪。
+        """
+        if start == tail or len(snake.positions) == 1:
+            return True
+        blocked = self.blocked
+        neighbors = self.neighbors
+        seen = {start}
+        queue = deque([start])
+        work = 0
+        while queue:
+            cell = queue.popleft()
+            for n in neighbors[cell]:
+                if n == tail:
+                    return True
+                if n not in seen and not blocked[n]:
+                    seen.add(n)
+                    queue.append(n)
+            work += 1
+            if work >= self.budget:
+                return True
+        return False
@@ -0,0 +1,308 @@
+import random
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # 只有VecSnakeEnv需要numpy
+    np = None
+
+# 贪吃蛇的纯逻辑核心，使用网格坐标，不依赖pygame，可用于训练和批量模拟
+
+# 默认棋盘尺寸，与窗口版的可玩区域一致
+GRID_WIDTH = 38
+GRID_HEIGHT = 28
+
+# 方向定义
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+# 动作编号对应的方向，VecSnakeEnv使用
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# 每吃到一个食物的得分
+FOOD_SCORE = 10
+
+
+class FreeCells:
+    """空闲格子索引：数组加位置字典，增删都是O(1)，随机取空格也是O(1)"""
+
+    def __init__(self, cells):
+        self.cells = list(cells)
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def add(self, cell):
+        self.index[cell] = len(self.cells)
+        self.cells.append(cell)
+
+    def remove(self, cell):
+        # 用最后一个元素填补被删除的位置
+        i = self.index.pop(cell)
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.index[last] = i
+
+    def sample(self, rng=random):
+        """随机返回一个空格子，没有空格子时返回None"""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+
+class SnakeBody:
+    """网格坐标下的蛇身：双端队列加占用集合，并同步维护空闲格子"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.reset()
+
+    def reset(self):
+        """重置蛇的位置到网格中心"""
+        start = (self.width // 2, self.height // 2)
+
+        # 身体用双端队列存储，头部在左端；occupied是身体格子的集合，随头尾增量更新
+        self.positions = deque([start])
+        self.occupied = {start}
+
+        # 与身体同步维护的空闲格子，用于O(1)放置食物
+        self.free_cells = FreeCells(
+            (x, y)
+            for y in range(self.height)
+            for x in range(self.width)
+            if (x, y) != start
+        )
+        self.direction = RIGHT
+        self.score = 0
+        self.length = 1
+
+    def update(self):
+        """向当前方向移动一格，撞墙或撞到自己返回False"""
+        head_x, head_y = self.positions[0]
+        dir_x, dir_y = self.direction
+        new_x = head_x + dir_x
+        new_y = head_y + dir_y
+
+        # 检查是否撞墙
+        if not (0 <= new_x < self.width and 0 <= new_y < self.height):
+            return False
+
+        # 检查是否撞到自己（尾巴这一步会移开时可以进入尾巴的格子）
+        new_head = (new_x, new_y)
+        tail_moves = len(self.positions) >= self.length
+        if new_head in self.occupied and not (tail_moves and new_head == self.positions[-1]):
+            return False
+
+        # 更新位置
+        if tail_moves:
+            tail = self.positions.pop()
+            self.occupied.discard(tail)
+            self.free_cells.add(tail)
+        self.positions.appendleft(new_head)
+        self.occupied.add(new_head)
+        self.free_cells.remove(new_head)
+        return True
+
+    def get_head_position(self):
+        return self.positions[0]
+
+    def turn(self, direction):
+        if self.length > 1:
+            if (direction[0] * -1, direction[1] * -1) == self.direction:
+                return
+        self.direction = direction
+
+    def occupies(self, pos):
+        """判断某个格子是否被蛇身占据"""
+        return pos in self.occupied
+
+
+class SnakeEngine:
+    """单局贪吃蛇逻辑：蛇、食物和计分"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        self.width = width
+        self.height = height
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """开始新的一局；不给种子时随机生成一个，记录在self.seed中"""
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.snake = SnakeBody(self.width, self.height)
+        self.food = None
+        self.game_over = False
+        self.won = False
+        self.steps = 0
+        self.place_food()
+
+    @property
+    def score(self):
+        return self.snake.score
+
+    def place_food(self):
+        """从空闲格子中选取食物位置，棋盘被占满时判定获胜"""
+        self.food = self.snake.free_cells.sample(self.rng)
+        if self.food is None:
+            self.won = True
+            self.game_over = True
+
+    def step(self, direction=None):
+        """转向（可选）并前进一步，返回奖励：吃到食物1，死亡-1，否则0"""
+        if self.game_over:
+            return 0
+        if direction is not None:
+            self.snake.turn(direction)
+        self.steps += 1
+        if not self.snake.update():
+            self.game_over = True
+            return -1
+        if self.snake.positions[0] == self.food:
+            self.snake.length += 1
+            self.snake.score += FOOD_SCORE
+            self.place_food()
+            return 1
+        return 0
+
+
+class VecSnakeEnv:
+    """同时推进N局独立游戏的向量化环境，状态全部保存在NumPy数组中
+
+    动作是DIRECTIONS中的下标（0上 1下 2左 3右），掉头视为保持原方向。
+    观察是(N, 高, 宽)的int8数组：0空地 1身体 2蛇头 3食物。
+    结束的游戏在step中自动重置，结束时的得分保存在episode_scores中。
+    """
+
+    def __init__(self, num_envs, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        if np is None:
+            raise ImportError("VecSnakeEnv需要numpy")
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        self.rng = np.random.default_rng(seed)
+
+        self.dx = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+        self.dy = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+        self.opposite = np.array([1, 0, 3, 2], dtype=np.int32)
+        self.env_ids = np.arange(num_envs)
+
+        # 蛇身环形缓冲区：body[i, head_ptr[i]]是蛇头，向前length[i]-1个是蛇尾
+        self.body = np.zeros((num_envs, self.num_cells), dtype=np.int32)
+        self.head_ptr = np.zeros(num_envs, dtype=np.int32)
+        self.length = np.ones(num_envs, dtype=np.int32)
+        self.occupancy = np.zeros((num_envs, self.num_cells), dtype=bool)
+        self.head_x = np.zeros(num_envs, dtype=np.int32)
+        self.head_y = np.zeros(num_envs, dtype=np.int32)
+        self.direction = np.zeros(num_envs, dtype=np.int32)
+        self.food = np.zeros(num_envs, dtype=np.int32)
+        self.score = np.zeros(num_envs, dtype=np.int32)
+        self.episode_scores = np.zeros(num_envs, dtype=np.int32)
+
+        self.reset()
+
+    def reset(self, env_ids=None):
+        """重置指定的游戏（默认全部），返回观察"""
+        self._reset_envs(self.env_ids if env_ids is None else env_ids)
+        return self.observe()
+
+    def _reset_envs(self, env_ids):
+        start_x = self.width // 2
+        start_y = self.height // 2
+        start = start_y * self.width + start_x
+
+        self.occupancy[env_ids] = False
+        self.occupancy[env_ids, start] = True
+        self.body[env_ids, 0] = start
+        self.head_ptr[env_ids] = 0
+        self.length[env_ids] = 1
+        self.head_x[env_ids] = start_x
+        self.head_y[env_ids] = start_y
+        self.direction[env_ids] = DIRECTIONS.index(RIGHT)
+        self.score[env_ids] = 0
+        self._spawn_food(env_ids)
+
+    def _spawn_food(self, env_ids):
+        """为指定游戏放置食物，返回棋盘已满（获胜）的掩码"""
+        won = np.zeros(len(env_ids), dtype=bool)
+        for k, i in enumerate(env_ids):
+            free = self.num_cells - self.length[i]
+            if free <= 0:
+                self.food[i] = -1
+                won[k] = True
+                continue
+            # 空格较多时拒绝采样，较满时直接在空格列表中选
+            if free * 2 >= self.num_cells:
+                while True:
+                    cell = self.rng.integers(self.num_cells)
+                    if not self.occupancy[i, cell]:
+                        break
+            else:
+                cell = self.rng.choice(np.flatnonzero(~self.occupancy[i]))
+            self.food[i] = cell
+        return won
+
+    def step(self, actions):
+        """所有游戏同时前进一步，返回(观察, 奖励, 结束标志)"""
+        actions = np.asarray(actions, dtype=np.int32)
+        ids = self.env_ids
+
+        # 长度大于1时不能掉头
+        reverse = (actions == self.opposite[self.direction]) & (self.length > 1)
+        self.direction = np.where(reverse, self.direction, actions)
+
+        new_x = self.head_x + self.dx[self.direction]
+        new_y = self.head_y + self.dy[self.direction]
+        wall = (new_x < 0) | (new_x >= self.width) | (new_y < 0) | (new_y >= self.height)
+        cell = np.where(wall, 0, new_y * self.width + new_x)
+
+        ate = ~wall & (cell == self.food)
+        tail_ptr = (self.head_ptr - self.length + 1) % self.num_cells
+        tail = self.body[ids, tail_ptr]
+        # 没吃到食物时尾巴会移开，可以进入尾巴的格子
+        hit = self.occupancy[ids, cell] & ~(~ate & (cell == tail))
+        dead = wall | hit
+        alive = ~dead
+
+        # 移动尾巴和蛇头
+        move_tail = alive & ~ate
+        self.occupancy[ids[move_tail], tail[move_tail]] = False
+        moved = ids[alive]
+        self.head_ptr[moved] = (self.head_ptr[moved] + 1) % self.num_cells
+        self.body[moved, self.head_ptr[moved]] = cell[moved]
+        self.occupancy[moved, cell[moved]] = True
+        self.head_x[moved] = new_x[moved]
+        self.head_y[moved] = new_y[moved]
+
+        rewards = ate.astype(np.float32) - dead.astype(np.float32)
+        dones = dead.copy()
+
+        # 吃到食物的游戏增长并重新放置食物
+        eaten = ids[ate]
+        if len(eaten):
+            self.length[eaten] += 1
+            self.score[eaten] += FOOD_SCORE
+            dones[eaten] |= self._spawn_food(eaten)
+
+        # 记录结束时的得分并自动重置
+        finished = ids[dones]
+        if len(finished):
+            self.episode_scores[finished] = self.score[finished]
+            self._reset_envs(finished)
+        return self.observe(), rewards, dones
+
+    def observe(self):
+        """生成(N, 高, 宽)的观察数组"""
+        obs = self.occupancy.astype(np.int8)
+        obs[self.env_ids, self.head_y * self.width + self.head_x] = 2
+        has_food = self.food >= 0
+        obs[self.env_ids[has_food], self.food[has_food]] = 3
+        return obs.reshape(self.num_envs, self.height, self.width)